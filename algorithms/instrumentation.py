@@ -0,0 +1,107 @@
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+INSTRUMENTATION_MODES = ('timing', 'memory', 'both')
+
+_region_hooks: list[Callable[[bool], None]] = []
+
+
+class Counters:
+    enabled = True
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        self.timings: dict[str, float] = {}
+
+    def add(self, name: str, n=1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start_time
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            **self.counts,
+            **{f'{name}_s': elapsed for name, elapsed in self.timings.items()},
+        }
+
+
+class _NullCounters(Counters):
+    enabled = False
+
+    def add(self, name: str, n=1) -> None:
+        pass
+
+    def phase(self, name: str):
+        return _NO_PHASE
+
+
+_NO_PHASE = nullcontext()
+NULL_COUNTERS = _NullCounters()
+_active_counters: Counters = NULL_COUNTERS
+
+
+def current_counters() -> Counters:
+    return _active_counters
+
+
+@contextmanager
+def counting(counters: Counters) -> Iterator[Counters]:
+    global _active_counters
+    previous = _active_counters
+    _active_counters = counters
+    try:
+        yield counters
+    finally:
+        _active_counters = previous
+
+
+@contextmanager
+def region_hook(hook: Callable[[bool], None]) -> Iterator[None]:
+    _region_hooks.append(hook)
+    try:
+        yield
+    finally:
+        _region_hooks.remove(hook)
+
+
+class Measurement:
+    def __init__(self, mode='both') -> None:
+        if mode not in INSTRUMENTATION_MODES:
+            raise ValueError(f'Unknown instrumentation mode {mode!r}')
+
+        self.mode = mode
+        self.start_time = 0.0
+        self.run_time = 0.0
+        self.peak_memory = 0
+
+    @property
+    def traces_memory(self) -> bool:
+        return self.mode != 'timing'
+
+    def elapsed(self) -> float:
+        return perf_counter() - self.start_time
+
+    def __enter__(self) -> 'Measurement':
+        if self.traces_memory:
+            tracemalloc.start()
+        for hook in _region_hooks:
+            hook(True)
+        self.start_time = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.run_time = self.elapsed()
+        for hook in _region_hooks:
+            hook(False)
+        if self.traces_memory:
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
@@ -1,197 +1,784 @@
-import tracemalloc
+import random
 from abc import ABC, abstractmethod
-from copy import deepcopy
-from dataclasses import dataclass
+from collections.abc import Iterator
+from dataclasses import dataclass, field, replace
 from time import perf_counter
-from typing import List, Union
 
-from numpy import ma
+import numpy as np
 
+from algorithms.instrumentation import Measurement, current_counters
+from algorithms.warm_start import CachedSolution, SolutionCache
 from models.cell import Open
-from models.maze import MdpMaze
+from models.maze import MdpMaze, is_precision_change, precision_changes
+from models.transition_model import TransitionRows
 
 
 @dataclass(frozen=True)
 class VISnapshot:
-    maze: MdpMaze
+    values: np.ndarray
+    policy: np.ndarray
     delta_v: float
+    span: float = 0.0
+    policy_changes: int = 0
 
 
 @dataclass(frozen=True)
 class PISnapshot:
-    maze: MdpMaze
+    values: np.ndarray
+    policy: np.ndarray
     delta_v: float
     mode: str
     eval_iters: int
     improve_iters: int
+    span: float = 0.0
+    policy_changes: int = 0
+
+
+@dataclass(frozen=True)
+class IterationTrace:
+    residual: float
+    span: float
+    policy_changes: int
+    sweep_time: float
 
 
 @dataclass(frozen=True)
 class ValueIterationResult:
-    snapshots: List[VISnapshot]
-    shortest_path: List[Open]
+    snapshots: list[VISnapshot]
+    shortest_path: list[Open]
     run_time: float
     peak_memory: int
     iterations: int
+    warm_start: str = 'cold'
+    iterations_saved: int | None = None
+    run_time_saved: float | None = None
+    trace: list[IterationTrace] = field(default_factory=list)
+    error_bound: float | None = None
 
 
 @dataclass(frozen=True)
 class PolicyIterationResult:
-    snapshots: List[PISnapshot]
-    shortest_path: List[Open]
+    snapshots: list[PISnapshot]
+    shortest_path: list[Open]
     run_time: float
     peak_memory: int
     total_eval_iterations: int
     total_improve_iterations: int
+    warm_start: str = 'cold'
+    iterations_saved: int | None = None
+    run_time_saved: float | None = None
+    trace: list[IterationTrace] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class LRTDPResult(ValueIterationResult):
+    backups: int = 0
+    touched_states: int = 0
+    untouched_states: int = 0
+
+
+@dataclass
+class _TrialStats:
+    touched: set[int] = field(default_factory=set)
+    backups: int = 0
+    residual_checks: int = 0
+
+
+@dataclass(frozen=True)
+class MdpConfig:
+    discount: float
+    noise: float
+    living_reward: float
+
+
+@dataclass(frozen=True)
+class BatchValueIterationResult:
+    configs: list[MdpConfig]
+    results: list[ValueIterationResult]
+    run_time: float
+    peak_memory: int
+    sweeps: int
 
 
 class MdpAlgorithm(ABC):
     def __init__(
-        self, discount: float, living_reward: float, noise=0.2, theta=0.0001
+        self,
+        discount: float,
+        living_reward: float,
+        noise=0.2,
+        theta=0.0001,
+        warm_start='cold',
+        cache: SolutionCache | None = None,
     ) -> None:
         self.discount = discount
         self.living_reward = living_reward
         self.noise = noise
         self.theta = theta
+        self.warm_start = warm_start
+        self.cache = cache
+
+    def apply_warm_start(self, maze: MdpMaze) -> tuple[str, CachedSolution | None]:
+        if self.warm_start == 'bfs':
+            maze.init_from_distances(self.discount, self.living_reward)
+            return 'bfs', None
+
+        if self.warm_start == 'cache' and self.cache is not None:
+            solution = self.cache.lookup(
+                maze, type(self).__name__, self.discount, self.noise, self.living_reward
+            )
+            if solution is not None:
+                maze.init_from_solution(solution.values, solution.policy)
+                return 'cache', solution
+
+        return 'cold', None
+
+    def store_solution(self, maze: MdpMaze, iterations: int, run_time: float) -> None:
+        if self.cache is None:
+            return
+
+        self.cache.store(
+            maze,
+            type(self).__name__,
+            self.discount,
+            self.noise,
+            self.living_reward,
+            iterations,
+            run_time,
+        )
+
+    @abstractmethod
+    def iterate(self, maze: MdpMaze) -> Iterator[VISnapshot | PISnapshot]:
+        pass
 
     @abstractmethod
     def solve(
-        self, maze: MdpMaze, take_snapshots: bool
-    ) -> Union[ValueIterationResult, PolicyIterationResult]:
+        self, maze: MdpMaze, take_snapshots: bool, instrumentation='both'
+    ) -> ValueIterationResult | PolicyIterationResult:
         pass
 
 
 class ValueIteration(MdpAlgorithm):
     def __init__(
-        self, discount: float, living_reward: float, noise=0.2, theta=0.0000001
+        self,
+        discount: float,
+        living_reward: float,
+        noise=0.2,
+        theta=0.0000001,
+        warm_start='cold',
+        cache: SolutionCache | None = None,
+        stopping='residual',
+        epsilon=0.01,
+        stable_sweeps=5,
     ) -> None:
-        super().__init__(discount, living_reward, noise, theta)
+        if stopping not in ('residual', 'span', 'policy'):
+            raise ValueError(f'Unknown value iteration stopping rule {stopping!r}')
+
+        super().__init__(discount, living_reward, noise, theta, warm_start, cache)
+        self.stopping = stopping
+        self.epsilon = epsilon
+        self.stable_sweeps = stable_sweeps
+
+    def iterate(self, maze: MdpMaze) -> Iterator[VISnapshot]:
+        counters = current_counters()
+        rewards = memoryview(maze.rewards)
+        stable = 0
+        sweeps = 0
+        is_converged = False
+
+        while not is_converged:
+            with counters.phase('bellman_sweeps'):
+                snapshot = self._value_iteration_step(maze, rewards)
+            sweeps += 1
+            stable = stable + 1 if snapshot.policy_changes == 0 else 0
+            is_converged = self._is_converged(snapshot, stable)
+            yield snapshot
+
+        with counters.phase('policy_extraction'):
+            self._extract_policy(maze)
+
+        if counters.enabled:
+            counts = maze.compile_transitions(self.noise).counts
+            actions = int(counts[maze.updatable].sum())
+            counters.add('sweeps', sweeps)
+            counters.add('bellman_backups', sweeps * len(maze.nonterminal))
+            counters.add('q_evaluations', (sweeps + 1) * actions)
+
+    def error_bound(self, delta_v: float, span: float) -> float | None:
+        if self.discount >= 1:
+            return None
+
+        if self.stopping == 'span':
+            return self.discount * span / (1 - self.discount)
+        return 2 * self.discount * delta_v / (1 - self.discount)
+
+    def _is_converged(self, snapshot: VISnapshot, stable: int) -> bool:
+        if snapshot.delta_v <= self.theta:
+            return True
+
+        if self.stopping == 'span' and self.discount < 1:
+            threshold = self.epsilon * (1 - self.discount) / self.discount
+            return snapshot.span <= threshold
+
+        if self.stopping == 'policy':
+            return stable >= self.stable_sweeps
+
+        return False
 
-    def solve(self, maze: MdpMaze, take_snapshots=True) -> ValueIterationResult:
+    def solve(
+        self, maze: MdpMaze, take_snapshots=True, instrumentation='both'
+    ) -> ValueIterationResult:
         delta_V = float('inf')
+        span = float('inf')
         snapshots = []
+        trace = []
         iterations = 0
-        start_time = perf_counter()
-        tracemalloc.start()
-
-        while delta_V > self.theta:
-            delta_V = self._value_iteration_step(maze)
-            iterations += 1
+        with Measurement(instrumentation) as measurement:
+            with current_counters().phase('warm_start'):
+                warm_start, baseline = self.apply_warm_start(maze)
+
+            sweep_start = perf_counter()
+            for snapshot in self.iterate(maze):
+                delta_V = snapshot.delta_v
+                span = snapshot.span
+                iterations += 1
+                trace.append(
+                    IterationTrace(
+                        delta_V,
+                        span,
+                        snapshot.policy_changes,
+                        perf_counter() - sweep_start,
+                    )
+                )
 
-            if take_snapshots:
-                snapshot = VISnapshot(deepcopy(maze), delta_V)
-                snapshots.append(snapshot)
+                if take_snapshots:
+                    snapshots.append(_copied(snapshot))
+                sweep_start = perf_counter()
 
-        for cell in maze.get_open_cells():
-            if cell == maze.end:
-                continue
-            vba = maze.value_by_action(cell, self.noise)
-            if vba:
-                cell.policy = max(vba, key=lambda a: vba[a])
-
-        _, peak_mem = tracemalloc.get_traced_memory()
-        tracemalloc.stop()
-        run_time = perf_counter() - start_time
-        snapshots.append(VISnapshot(deepcopy(maze), delta_V))
+        run_time, peak_mem = measurement.run_time, measurement.peak_memory
+        snapshots.append(VISnapshot(maze.values.copy(), maze.policy.copy(), delta_V))
         shortest_path = maze.shortest_path(maze.start, maze.end)
 
-        return ValueIterationResult(
-            snapshots, shortest_path, run_time, peak_mem, iterations
+        iterations_saved, run_time_saved = None, None
+        if baseline is not None:
+            iterations_saved = baseline.iterations - iterations
+            run_time_saved = baseline.run_time - run_time
+        self.store_solution(
+            maze, iterations + (iterations_saved or 0), run_time + (run_time_saved or 0)
         )
 
-    def _value_iteration_step(self, maze: MdpMaze) -> float:
-        max_diff_value = 0.0
-        for cell in maze.get_open_cells():
-            if cell == maze.end:
-                continue
-
-            value_by_action = maze.value_by_action(cell, self.noise)
-
-            if value_by_action:
-                best_direction = max(value_by_action, key=lambda a: value_by_action[a])
-                max_q = value_by_action[best_direction]
-
-                old_value = cell.value
-                new_value = self.living_reward + self.discount * max_q
-
-                max_diff_value = max(max_diff_value, abs(new_value - old_value))
-                cell.value = new_value
+        return ValueIterationResult(
+            snapshots,
+            shortest_path,
+            run_time,
+            peak_mem,
+            iterations,
+            warm_start,
+            iterations_saved,
+            run_time_saved,
+            trace,
+            self.error_bound(delta_V, span),
+        )
 
-        return max_diff_value
+    def _extract_policy(self, maze: MdpMaze) -> None:
+        rows = maze.compile_transitions(self.noise).rows()
+        values = memoryview(maze.values)
+        policy = memoryview(maze.policy)
+        for s in memoryview(maze.nonterminal):
+            policy[s] = greedy_action(values, rows, s)[0]
+
+    def _value_iteration_step(self, maze: MdpMaze, rewards: memoryview) -> VISnapshot:
+        rows = maze.compile_transitions(self.noise).rows()
+        values = memoryview(maze.values)
+        policy = memoryview(maze.policy)
+        dtype = maze.values.dtype
+        min_diff, max_diff = 0.0, 0.0
+        policy_changes = 0
+        for s in memoryview(maze.nonterminal):
+            action, max_q = greedy_action(values, rows, s)
+
+            old_value = values[s]
+            values[s] = self.living_reward + rewards[s] + self.discount * max_q
+            diff = values[s] - old_value
+            if diff > max_diff and is_precision_change(diff, values[s], dtype):
+                max_diff = diff
+            elif diff < min_diff and is_precision_change(diff, values[s], dtype):
+                min_diff = diff
+
+            if policy[s] != action:
+                policy[s] = action
+                policy_changes += 1
+
+        return VISnapshot(
+            maze.values,
+            maze.policy,
+            max(max_diff, -min_diff),
+            max_diff - min_diff,
+            policy_changes,
+        )
 
 
 class PolicyIteration(MdpAlgorithm):
     def __init__(
-        self, discount: float, living_reward: float, noise=0.2, theta=0.0001
+        self,
+        discount: float,
+        living_reward: float,
+        noise=0.2,
+        theta=0.0001,
+        warm_start='cold',
+        cache: SolutionCache | None = None,
     ) -> None:
-        super().__init__(discount, living_reward, noise, theta)
+        super().__init__(discount, living_reward, noise, theta, warm_start, cache)
 
-    def solve(self, maze: MdpMaze, take_snapshots=True) -> PolicyIterationResult:
-        snapshots = []
+    def iterate(self, maze: MdpMaze) -> Iterator[PISnapshot]:
+        counters = current_counters()
+        rewards = memoryview(maze.rewards)
         eval_iters = 0
         improve_iters = 0
-        start_time = perf_counter()
-        tracemalloc.start()
-        delta = float('inf')
         is_stable = False
 
         while not is_stable:
+            delta = float('inf')
             while delta > self.theta:
-                delta = self._policy_evaluation_step(maze)
+                with counters.phase('policy_evaluation'):
+                    delta, span = self._policy_evaluation_step(maze, rewards)
                 eval_iters += 1
-                if take_snapshots:
-                    snapshot = PISnapshot(
-                        deepcopy(maze), delta, 'eval', eval_iters, improve_iters
-                    )
-                    snapshots.append(snapshot)
+                yield PISnapshot(
+                    maze.values,
+                    maze.policy,
+                    delta,
+                    'eval',
+                    eval_iters,
+                    improve_iters,
+                    span,
+                )
 
-            is_stable = self._policy_improvement_step(maze)
+            with counters.phase('policy_improvement'):
+                policy_changes = self._policy_improvement_step(maze)
+            is_stable = policy_changes == 0
             improve_iters += 1
-            delta = float('inf')
+            yield PISnapshot(
+                maze.values,
+                maze.policy,
+                0.0,
+                'improve',
+                eval_iters,
+                improve_iters,
+                0.0,
+                policy_changes,
+            )
+
+        if counters.enabled:
+            counters.add('bellman_backups', eval_iters * len(maze.nonterminal))
+            counters.add('improvement_backups', improve_iters * len(maze.nonterminal))
 
-            if take_snapshots:
-                snapshot = PISnapshot(
-                    deepcopy(maze), 0.0, 'improve', eval_iters, improve_iters
+    def solve(
+        self, maze: MdpMaze, take_snapshots=True, instrumentation='both'
+    ) -> PolicyIterationResult:
+        snapshots = []
+        trace = []
+        eval_iters = 0
+        improve_iters = 0
+        with Measurement(instrumentation) as measurement:
+            with current_counters().phase('warm_start'):
+                warm_start, baseline = self.apply_warm_start(maze)
+
+            sweep_start = perf_counter()
+            for snapshot in self.iterate(maze):
+                eval_iters = snapshot.eval_iters
+                improve_iters = snapshot.improve_iters
+                trace.append(
+                    IterationTrace(
+                        snapshot.delta_v,
+                        snapshot.span,
+                        snapshot.policy_changes,
+                        perf_counter() - sweep_start,
+                    )
                 )
-                snapshots.append(snapshot)
 
-        _, peak_mem = tracemalloc.get_traced_memory()
-        tracemalloc.stop()
-        run_time = perf_counter() - start_time
+                if take_snapshots:
+                    snapshots.append(_copied(snapshot))
+                sweep_start = perf_counter()
+
+        run_time, peak_mem = measurement.run_time, measurement.peak_memory
         shortest_path = maze.shortest_path(maze.start, maze.end)
+
+        iterations = eval_iters + improve_iters
+        iterations_saved, run_time_saved = None, None
+        if baseline is not None:
+            iterations_saved = baseline.iterations - iterations
+            run_time_saved = baseline.run_time - run_time
+        self.store_solution(
+            maze, iterations + (iterations_saved or 0), run_time + (run_time_saved or 0)
+        )
+
         return PolicyIterationResult(
-            snapshots, shortest_path, run_time, peak_mem, eval_iters, improve_iters
+            snapshots,
+            shortest_path,
+            run_time,
+            peak_mem,
+            eval_iters,
+            improve_iters,
+            warm_start,
+            iterations_saved,
+            run_time_saved,
+            trace,
         )
 
-    def _policy_evaluation_step(self, maze: MdpMaze) -> float:
-        max_delta_v = float('-inf')
-        for cell in maze.get_open_cells():
-            if cell == maze.end:
-                continue
+    def _policy_evaluation_step(
+        self, maze: MdpMaze, rewards: memoryview
+    ) -> tuple[float, float]:
+        rows = maze.compile_transitions(self.noise).rows()
+        values = memoryview(maze.values)
+        policy = memoryview(maze.policy)
+        dtype = maze.values.dtype
+        min_diff, max_diff = 0.0, 0.0
+        for s in memoryview(maze.nonterminal):
+            exp_value = expected_value(values, rows, s, policy[s])
+
+            old_value = values[s]
+            values[s] = self.living_reward + rewards[s] + self.discount * exp_value
+            diff = values[s] - old_value
+            if diff > max_diff and is_precision_change(diff, values[s], dtype):
+                max_diff = diff
+            elif diff < min_diff and is_precision_change(diff, values[s], dtype):
+                min_diff = diff
+
+        return max(max_diff, -min_diff), max_diff - min_diff
+
+    def _policy_improvement_step(self, maze: MdpMaze) -> int:
+        rows = maze.compile_transitions(self.noise).rows()
+        values = memoryview(maze.values)
+        policy = memoryview(maze.policy)
+        policy_changes = 0
+
+        for s in memoryview(maze.nonterminal):
+            old_policy = policy[s]
+            max_value = float('-inf')
+            for k in range(rows.offsets[s], rows.offsets[s + 1]):
+                j = rows.next_states[k]
+                if values[j] > max_value:
+                    max_value = values[j]
+                    policy[s] = rows.actions[k]
+
+            if old_policy != policy[s]:
+                policy_changes += 1
+
+        return policy_changes
+
+
+class LRTDP(MdpAlgorithm):
+    def __init__(
+        self,
+        discount: float,
+        living_reward: float,
+        noise=0.2,
+        theta=0.0001,
+        heuristic='bfs',
+        seed: int | None = None,
+    ) -> None:
+        super().__init__(discount, living_reward, noise, theta)
+        self.heuristic = heuristic
+        self.seed = seed
+
+    def iterate(self, maze: MdpMaze) -> Iterator[VISnapshot]:
+        return self._trials(maze, _TrialStats())
+
+    def solve(
+        self, maze: MdpMaze, take_snapshots=True, instrumentation='both'
+    ) -> LRTDPResult:
+        snapshots = []
+        stats = _TrialStats()
+        delta_V = float('inf')
+        trials = 0
+        with Measurement(instrumentation) as measurement:
+            for snapshot in self._trials(maze, stats):
+                delta_V = snapshot.delta_v
+                trials += 1
 
-            old_value = cell.value
-            exp_value = maze.value_by_action(cell, self.noise)[cell.policy]
-            cell.value = self.living_reward + self.discount * exp_value
-            dV = abs(cell.value - old_value)
-            max_delta_v = max(max_delta_v, dV)
+                if take_snapshots:
+                    snapshots.append(_copied(snapshot))
 
-        return max_delta_v
+        run_time, peak_mem = measurement.run_time, measurement.peak_memory
+        snapshots.append(VISnapshot(maze.values.copy(), maze.policy.copy(), delta_V))
+        shortest_path = maze.shortest_path(maze.start, maze.end)
+        open_cells = int((~maze.terminals).sum())
+
+        return LRTDPResult(
+            snapshots,
+            shortest_path,
+            run_time,
+            peak_mem,
+            trials,
+            backups=stats.backups,
+            touched_states=len(stats.touched),
+            untouched_states=open_cells - len(stats.touched),
+        )
 
-    def _policy_improvement_step(self, maze: MdpMaze) -> bool:
-        is_stable = True
+    def _trials(self, maze: MdpMaze, stats: _TrialStats) -> Iterator[VISnapshot]:
+        model = maze.compile_transitions(self.noise)
+        rows = model.rows()
+        values = memoryview(maze.values)
+        rewards = memoryview(maze.rewards)
+        rng = random.Random(self.seed)
+        counters = current_counters()
+        with counters.phase('heuristic_init'):
+            self._init_heuristic(maze)
+        start = maze.state_of(maze.start)
+        solved = set(np.flatnonzero(maze.terminals).tolist())
+        max_trial_length = len(maze.values)
+        trials = 0
+
+        while start not in solved:
+            delta_V = 0.0
+            trial: list[int] = []
+            s = start
+
+            while s not in solved and len(trial) < max_trial_length:
+                trial.append(s)
+                stats.touched.add(s)
+
+                if not rows.counts[s]:
+                    break
+
+                action, delta = self._backup(rows, values, rewards, s, stats)
+                delta_V = max(delta_V, delta)
+                next_states, probabilities = rows.transitions(s, action)
+                s = rng.choices(next_states, probabilities)[0]
+
+            with counters.phase('check_solved'):
+                while trial:
+                    s = trial.pop()
+                    if not self._check_solved(rows, values, rewards, s, solved, stats):
+                        break
+
+            trials += 1
+            yield VISnapshot(maze.values, maze.policy, delta_V)
+
+        for s in stats.touched:
+            if rows.counts[s]:
+                maze.policy[s] = greedy_action(values, rows, s)[0]
+
+        counters.add('trials', trials)
+        counters.add('bellman_backups', stats.backups)
+        counters.add('residual_checks', stats.residual_checks)
+
+    def _init_heuristic(self, maze: MdpMaze) -> None:
+        if self.heuristic == 'bfs':
+            steps, _ = maze.goal_distances()
+        else:
+            exits = maze.coordinates[maze.terminals]
+            offsets = maze.coordinates[:, None, :] - exits[None, :, :]
+            steps = np.abs(offsets).sum(axis=2, dtype=float).min(axis=1, initial=np.inf)
+
+        step_reward = self.living_reward + float(
+            maze.rewards[maze.updatable].max(initial=0.0)
+        )
+        for i in maze.nonterminal:
+            maze.values[i] = maze.distance_value(
+                steps[i], maze.goal_reward, self.discount, step_reward
+            )
+
+        if self.discount < 1:
+            ceiling = step_reward / (1 - self.discount)
+            maze.values[maze.updatable] = np.maximum(
+                maze.values[maze.updatable], ceiling
+            )
+
+    def _backup(
+        self,
+        rows: TransitionRows,
+        values: memoryview,
+        rewards: memoryview,
+        s: int,
+        stats: _TrialStats,
+    ) -> tuple[int, float]:
+        action, max_q = greedy_action(values, rows, s)
+
+        old_value = values[s]
+        values[s] = self.living_reward + rewards[s] + self.discount * max_q
+        stats.backups += 1
+        return action, abs(values[s] - old_value)
+
+    def _check_solved(
+        self,
+        rows: TransitionRows,
+        values: memoryview,
+        rewards: memoryview,
+        s: int,
+        solved: set[int],
+        stats: _TrialStats,
+    ) -> bool:
+        is_solved = True
+        open_stack = [] if s in solved else [s]
+        seen = set(open_stack)
+        closed = []
+
+        while open_stack:
+            curr = open_stack.pop()
+            closed.append(curr)
+            stats.touched.add(curr)
+
+            if not rows.counts[curr]:
+                continue
 
-        for cell in maze.get_open_cells():
-            if cell == maze.end:
+            action, max_q = greedy_action(values, rows, curr)
+            stats.residual_checks += 1
+            residual = abs(
+                self.living_reward
+                + rewards[curr]
+                + self.discount * max_q
+                - values[curr]
+            )
+            if residual > self.theta:
+                is_solved = False
                 continue
 
-            old_policy = cell.policy
-            max_value = float('-inf')
-            for action, neighbor in maze.neighbors(cell):
-                if neighbor.value > max_value:
-                    max_value = neighbor.value
-                    cell.policy = action
+            lo, hi = rows.offsets[curr], rows.offsets[curr + 1]
+            keep, spread = rows.keep[hi - lo], rows.spread[hi - lo]
+            for k in range(lo, hi):
+                j = rows.next_states[k]
+                p = keep if rows.actions[k] == action else spread
+                if p > 0 and j not in solved and j not in seen:
+                    open_stack.append(j)
+                    seen.add(j)
+
+        if is_solved:
+            solved.update(closed)
+        else:
+            while closed:
+                curr = closed.pop()
+                if rows.counts[curr]:
+                    self._backup(rows, values, rewards, curr, stats)
+
+        return is_solved
+
+
+class BatchValueIteration:
+    def __init__(self, configs: list[MdpConfig], theta=0.0000001) -> None:
+        self.configs = configs
+        self.theta = theta
+
+    def solve(self, maze: MdpMaze, instrumentation='both') -> BatchValueIterationResult:
+        counters = current_counters()
+        with Measurement(instrumentation) as measurement:
+            model = maze.compile_transitions(self.configs[0].noise)
+            valid = model.successors >= 0
+            safe_successors = np.where(valid, model.successors, 0)
+            counts = model.counts
+            updatable = maze.updatable
+
+            discounts = np.array([c.discount for c in self.configs])[:, None]
+            noises = np.array([c.noise for c in self.configs])[:, None]
+            living_rewards = np.array([c.living_reward for c in self.configs])[:, None]
+            rewards = living_rewards + maze.rewards[None, :]
+
+            is_noisy = counts > 1
+            keep = np.where(is_noisy, 1 - noises, 1.0)
+            spread = np.where(is_noisy, noises / np.maximum(counts - 1, 1), 0.0)
+
+            K = len(self.configs)
+            V = np.tile(maze.values, (K, 1))
+            active = np.ones(K, dtype=bool)
+            iterations = np.zeros(K, dtype=int)
+            run_times = np.zeros(K)
+            sweeps = 0
+
+            while active.any():
+                with counters.phase('bellman_sweeps'):
+                    rows = np.flatnonzero(active)
+                    q = q_values(
+                        V[rows], safe_successors, valid, keep[rows], spread[rows]
+                    )
+                    best = np.where(updatable, q.max(axis=2), 0.0)
+                    old_V = V[rows]
+                    V[rows] = np.where(
+                        updatable, rewards[rows] + discounts[rows] * best, old_V
+                    )
+
+                    delta = np.abs(precision_changes(old_V, V[rows])).max(axis=1)
+                    iterations[rows] += 1
+                    sweeps += 1
+
+                converged = rows[delta <= self.theta]
+                run_times[converged] = measurement.elapsed()
+                active[converged] = False
+
+            with counters.phase('policy_extraction'):
+                policies = q_values(V, safe_successors, valid, keep, spread).argmax(
+                    axis=2
+                )
+
+        if counters.enabled:
+            counters.add('sweeps', sweeps)
+            counters.add('bellman_backups', int(iterations.sum() * updatable.sum()))
+
+        run_time, peak_mem = measurement.run_time, measurement.peak_memory
+
+        results = []
+        for k in range(K):
+            maze.values[:] = V[k]
+            maze.policy[updatable] = policies[k, updatable]
+
+            results.append(
+                ValueIterationResult(
+                    [],
+                    maze.shortest_path(maze.start, maze.end),
+                    float(run_times[k]),
+                    peak_mem,
+                    int(iterations[k]),
+                )
+            )
+
+        return BatchValueIterationResult(
+            self.configs, results, run_time, peak_mem, sweeps
+        )
 
-            if old_policy != cell.policy:
-                is_stable = False
 
-        return is_stable
+def _copied(
+    snapshot: VISnapshot | PISnapshot,
+) -> VISnapshot | PISnapshot:
+    return replace(
+        snapshot, values=snapshot.values.copy(), policy=snapshot.policy.copy()
+    )
+
+
+def q_values(V, successors, valid, keep, spread) -> np.ndarray:
+    neighbor_values = np.where(valid, V[:, successors], 0.0)
+    total = neighbor_values.sum(axis=2, keepdims=True)
+    q = keep[:, :, None] * neighbor_values + spread[:, :, None] * (
+        total - neighbor_values
+    )
+    return np.where(valid, q, -np.inf)
+
+
+def greedy_action(
+    values: memoryview, rows: TransitionRows, s: int
+) -> tuple[int, float]:
+    lo, hi = rows.offsets[s], rows.offsets[s + 1]
+    keep, spread = rows.keep[hi - lo], rows.spread[hi - lo]
+    next_states = rows.next_states
+    if hi - lo == 1:
+        return rows.actions[lo], keep * values[next_states[lo]]
+
+    best, max_q = lo, float('-inf')
+    for i in range(lo, hi):
+        q = 0.0
+        for k in range(lo, hi):
+            q += (keep if k == i else spread) * values[next_states[k]]
+        if q > max_q:
+            best, max_q = i, q
+
+    return rows.actions[best], max_q
+
+
+def expected_value(
+    values: memoryview, rows: TransitionRows, s: int, action: int
+) -> float:
+    lo, hi = rows.offsets[s], rows.offsets[s + 1]
+    keep, spread = rows.keep[hi - lo], rows.spread[hi - lo]
+    next_states, actions = rows.next_states, rows.actions
+    q = 0.0
+    for k in range(lo, hi):
+        q += (keep if actions[k] == action else spread) * values[next_states[k]]
+
+    return q
@@ -0,0 +1,183 @@
+import multiprocessing as mp
+from dataclasses import dataclass, field
+from itertools import pairwise
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+
+import numpy as np
+
+from algorithms.instrumentation import Measurement
+from algorithms.mdp_algorithms import ValueIterationResult, q_values
+from models.maze import MdpMaze, precision_changes
+
+
+@dataclass(frozen=True)
+class ParallelValueIterationResult(ValueIterationResult):
+    workers: int = 1
+    mode: str = 'jacobi'
+    worker_times: list[float] = field(default_factory=list)
+
+
+_shared: dict[str, np.ndarray] = {}
+_blocks: list[SharedMemory] = []
+
+
+class ParallelValueIteration:
+    def __init__(
+        self,
+        discount: float,
+        living_reward: float,
+        noise=0.2,
+        theta=0.0000001,
+        workers=4,
+        mode='jacobi',
+    ) -> None:
+        if mode not in ('jacobi', 'async'):
+            raise ValueError(f'Unknown parallel value iteration mode {mode!r}')
+
+        self.discount = discount
+        self.living_reward = living_reward
+        self.noise = noise
+        self.theta = theta
+        self.workers = workers
+        self.mode = mode
+
+    def solve(
+        self, maze: MdpMaze, instrumentation='both'
+    ) -> ParallelValueIterationResult:
+        with Measurement(instrumentation) as measurement:
+            model = maze.compile_transitions(self.noise)
+            successors = model.successors
+            valid = successors >= 0
+            updatable = maze.updatable
+            keep, spread = model.probabilities()
+
+            buffers = 2 if self.mode == 'jacobi' else 1
+            arrays = {
+                'values': np.tile(maze.values, (buffers, 1)),
+                'successors': successors,
+                'keep': keep,
+                'spread': spread,
+                'updatable': updatable,
+                'rewards': maze.step_rewards(self.living_reward),
+            }
+
+            blocks = {name: _to_shared(array) for name, array in arrays.items()}
+            specs = {
+                name: (block.name, arrays[name].shape, arrays[name].dtype.str)
+                for name, block in blocks.items()
+            }
+            bands = _row_bands(maze.coordinates[:, 0], self.workers)
+            worker_times = [0.0] * len(bands)
+
+            try:
+                context = mp.get_context()
+                with context.Pool(
+                    self.workers,
+                    initializer=_attach,
+                    initargs=(specs, self.discount),
+                ) as pool:
+                    src, dst = 0, buffers - 1
+                    delta_V = float('inf')
+                    iterations = 0
+                    while delta_V > self.theta:
+                        band_results = pool.starmap(
+                            _sweep_band,
+                            [(lo, hi, src, dst) for lo, hi in bands],
+                            chunksize=1,
+                        )
+                        delta_V = max(delta for delta, _ in band_results)
+                        for b, (_, elapsed) in enumerate(band_results):
+                            worker_times[b] += elapsed
+
+                        src, dst = dst, src
+                        iterations += 1
+
+                values = _view(blocks['values'], specs['values'])[src].copy()
+            finally:
+                for block in blocks.values():
+                    block.close()
+                    block.unlink()
+
+            policies = q_values(
+                values[None, :],
+                np.where(valid, successors, 0),
+                valid,
+                keep[None, :],
+                spread[None, :],
+            )[0].argmax(axis=1)
+
+            maze.values[:] = values
+            maze.policy[updatable] = policies[updatable]
+
+        run_time, peak_mem = measurement.run_time, measurement.peak_memory
+        shortest_path = maze.shortest_path(maze.start, maze.end)
+
+        return ParallelValueIterationResult(
+            [],
+            shortest_path,
+            run_time,
+            peak_mem,
+            iterations,
+            workers=self.workers,
+            mode=self.mode,
+            worker_times=worker_times,
+        )
+
+
+def _row_bands(rows: np.ndarray, workers: int) -> list[tuple[int, int]]:
+    n = len(rows)
+    cuts = [0]
+    for b in range(1, workers):
+        i = min(b * n // workers, n - 1)
+        row_start = int(np.searchsorted(rows, rows[i]))
+        cuts.append(max(row_start, cuts[-1]))
+    cuts.append(n)
+
+    return [(lo, hi) for lo, hi in pairwise(cuts) if hi > lo]
+
+
+def _to_shared(array: np.ndarray) -> SharedMemory:
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block
+
+
+def _view(block: SharedMemory, spec) -> np.ndarray:
+    _, shape, dtype = spec
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _attach(specs, discount: float) -> None:
+    for name, spec in specs.items():
+        block = SharedMemory(name=spec[0])
+        _blocks.append(block)
+        _shared[name] = _view(block, spec)
+
+    _shared['discount'] = np.float64(discount)
+
+
+def _sweep_band(lo: int, hi: int, src: int, dst: int) -> tuple[float, float]:
+    start_time = perf_counter()
+
+    values = _shared['values']
+    successors = _shared['successors'][lo:hi]
+    updatable = _shared['updatable'][lo:hi]
+    valid = successors >= 0
+
+    old_values = values[src, lo:hi].copy()
+    q = q_values(
+        values[src][None, :],
+        np.where(valid, successors, 0),
+        valid,
+        _shared['keep'][None, lo:hi],
+        _shared['spread'][None, lo:hi],
+    )[0]
+    best = np.where(updatable, q.max(axis=1), 0.0)
+    rewards = _shared['rewards'][lo:hi]
+    new_values = np.where(updatable, rewards + _shared['discount'] * best, old_values)
+    values[dst, lo:hi] = new_values
+
+    changes = precision_changes(old_values, values[dst, lo:hi])
+    delta = float(np.abs(changes).max())
+    return delta, perf_counter() - start_time
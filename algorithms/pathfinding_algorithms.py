@@ -1,11 +1,10 @@
 import math
-import tracemalloc
 from abc import ABC, abstractmethod
 from collections import deque
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
-from time import perf_counter
-from typing import Callable, Dict, List, OrderedDict
 
+from algorithms.instrumentation import Counters, Measurement, current_counters
 from models.cell import Cell, Open
 from models.maze import Maze
 from util.datastructures import PriorityQueue
@@ -13,103 +12,152 @@ from util.datastructures import PriorityQueue
 
 @dataclass(frozen=True)
 class PathFindingResult:
-    visited: List[Open]
-    shortest_path: List[Open]
+    visited: list[Open]
+    shortest_path: list[Open]
     run_time: float
     peak_memory_bytes: int
     max_fringe_size: int
 
 
+@dataclass(frozen=True)
+class Expansion:
+    cell: Open
+    fringe_size: int
+
+
+@dataclass(frozen=True)
+class PathFound:
+    shortest_path: list[Open]
+
+
+SearchEvent = Expansion | PathFound
+
+
+def _report_search(
+    counters: Counters, expansions: int, pushes: int, unique_pushes: int, **extra
+) -> None:
+    if not counters.enabled:
+        return
+
+    counters.add('expansions', expansions)
+    counters.add('pushes', pushes)
+    counters.add('duplicate_pushes', pushes - unique_pushes)
+    for name, n in extra.items():
+        counters.add(name, n)
+
+
+def _reconstruct_path(curr: Open | None, parent_map: dict[Open, Open | None]):
+    shortest_path = []
+    while curr:
+        shortest_path.append(curr)
+        curr = parent_map.get(curr)
+    return shortest_path
+
+
 class PathfindingAlgorithm(ABC):
     @abstractmethod
-    def solve(self, maze: Maze, start: Open) -> PathFindingResult:
+    def iterate(self, maze: Maze, start: Open) -> Iterator[SearchEvent]:
         pass
 
+    def solve(
+        self, maze: Maze, start: Open, instrumentation='both'
+    ) -> PathFindingResult:
+        visited: list[Open] = []
+        shortest_path: list[Open] = []
+        max_fringe_size = 1
 
-class DFS(PathfindingAlgorithm):
-    def solve(self, maze: Maze, start: Open) -> PathFindingResult:
-        tracemalloc.start()
-        start_time = perf_counter()
+        with Measurement(instrumentation) as measurement:
+            for event in self.iterate(maze, start):
+                if isinstance(event, PathFound):
+                    shortest_path = event.shortest_path
+                    break
+
+                visited.append(event.cell)
+                max_fringe_size = max(max_fringe_size, event.fringe_size)
 
+        return PathFindingResult(
+            visited,
+            shortest_path,
+            measurement.run_time,
+            measurement.peak_memory,
+            max_fringe_size,
+        )
+
+
+class DFS(PathfindingAlgorithm):
+    def iterate(self, maze: Maze, start: Open) -> Iterator[SearchEvent]:
         stack = [start]
-        visited = OrderedDict.fromkeys([])
-        parent_map: Dict[Open, Open | None] = {start: None}
-        max_fringe_size = len(stack)
+        visited = set()
+        parent_map: dict[Open, Open | None] = {start: None}
+        stale_pops = 0
 
         while stack:
             curr = stack.pop()
 
             if curr == maze.end:
-                _, peak_mem = tracemalloc.get_traced_memory()
-                tracemalloc.stop()
-                run_time = perf_counter() - start_time
-                shortest_path = []
-                while curr:
-                    shortest_path.append(curr)
-                    curr = parent_map.get(curr)
-
-                return PathFindingResult(
-                    list(visited.keys()),
-                    shortest_path,
-                    run_time,
-                    peak_mem,
-                    max_fringe_size,
-                )
+                self._report(visited, stack, parent_map, stale_pops + 1)
+                yield PathFound(_reconstruct_path(curr, parent_map))
+                return
 
             if curr in visited:
+                stale_pops += 1
                 continue
 
-            visited[curr] = None
+            visited.add(curr)
 
             for _, neighbors in maze.neighbors(curr):
                 if neighbors not in visited:
                     stack.append(neighbors)
                     parent_map[neighbors] = curr
-            max_fringe_size = max(max_fringe_size, len(stack))
-
-        return PathFindingResult(list(visited.keys()), [], 0, 0, max_fringe_size)
+            yield Expansion(curr, len(stack))
+
+        self._report(visited, stack, parent_map, stale_pops)
+
+    def _report(
+        self,
+        visited: set,
+        stack: list[Open],
+        parent_map: dict[Open, Open | None],
+        other_pops: int,
+    ) -> None:
+        pops = len(visited) + other_pops
+        _report_search(
+            current_counters(),
+            len(visited),
+            pops + len(stack) - 1,
+            len(parent_map) - 1,
+        )
 
 
 class BFS(PathfindingAlgorithm):
-    def solve(self, maze: Maze, start: Open) -> PathFindingResult:
-        tracemalloc.start()
-        start_time = perf_counter()
-
+    def iterate(self, maze: Maze, start: Open) -> Iterator[SearchEvent]:
         queue = deque([start])
-        visited = OrderedDict.fromkeys([])
-        parent_map: Dict[Open, Open | None] = {start: None}
-        max_fringe_size = len(queue)
+        visited = {start}
+        parent_map: dict[Open, Open | None] = {start: None}
 
-        visited[start] = None
+        yield Expansion(start, len(queue))
 
         while queue:
             curr = queue.popleft()
 
             if curr == maze.end:
-                _, peak_mem = tracemalloc.get_traced_memory()
-                tracemalloc.stop()
-                run_time = perf_counter() - start_time
-                shortest_path = []
-                while curr:
-                    shortest_path.append(curr)
-                    curr = parent_map.get(curr)
-
-                return PathFindingResult(
-                    list(visited.keys()),
-                    shortest_path,
-                    run_time,
-                    peak_mem,
-                    max_fringe_size,
-                )
+                self._report(visited, queue, found=True)
+                yield PathFound(_reconstruct_path(curr, parent_map))
+                return
 
             for _, neighbor in maze.neighbors(curr):
                 if neighbor not in visited:
-                    visited[neighbor] = None
+                    visited.add(neighbor)
                     queue.append(neighbor)
                     parent_map[neighbor] = curr
-            max_fringe_size = max(max_fringe_size, len(queue))
+                    yield Expansion(neighbor, len(queue))
+
+        self._report(visited, queue, found=False)
 
-        return PathFindingResult(list(visited.keys()), [], 0, 0, max_fringe_size)
+    def _report(self, visited: set, queue: deque, found: bool) -> None:
+        pushes = len(visited) - 1
+        pops = pushes + 1 - len(queue)
+        _report_search(current_counters(), pops - found, pushes, pushes)
 
 
 chebyshev_distance = lambda c1, c2: max(abs(c2.x - c1.x), abs(c2.y - c1.y))
@@ -121,48 +169,44 @@ class AStar(PathfindingAlgorithm):
     def __init__(self, heuristic: Callable[[Cell, Cell], float]) -> None:
         self.heuristic = heuristic
 
-    def solve(self, maze: Maze, start: Open) -> PathFindingResult:
-        tracemalloc.start()
-        start_time = perf_counter()
-
+    def iterate(self, maze: Maze, start: Open) -> Iterator[SearchEvent]:
         priority_queue = PriorityQueue()
-        visited = OrderedDict.fromkeys([])
-        parent_by_cell: Dict[Open, Open | None] = {start: None}
+        visited = {start}
+        parent_by_cell: dict[Open, Open | None] = {start: None}
         path_cost_by_cell = {start: 0.0}
 
         priority_queue.push(start, 1.0)
-        visited[start] = None
-        max_fringe_size = len(priority_queue.heap)
+        yield Expansion(start, len(priority_queue.heap))
 
-        while priority_queue:
+        while priority_queue.heap:
             curr = priority_queue.pop()
 
             if curr == maze.end:
-                _, peak_mem = tracemalloc.get_traced_memory()
-                tracemalloc.stop()
-                run_time = perf_counter() - start_time
-                shortest_path = []
-                while curr:
-                    shortest_path.append(curr)
-                    curr = parent_by_cell.get(curr)
-
-                return PathFindingResult(
-                    list(visited.keys()),
-                    shortest_path,
-                    run_time,
-                    peak_mem,
-                    max_fringe_size,
-                )
+                self._report(visited, priority_queue, found=True)
+                yield PathFound(_reconstruct_path(curr, parent_by_cell))
+                return
 
             for _, neighbor in maze.neighbors(curr):
                 if neighbor not in visited:
-                    visited[neighbor] = None
+                    visited.add(neighbor)
                     path_cost_by_cell[neighbor] = path_cost_by_cell[curr] + 1.0
 
                     f = self.heuristic(neighbor, maze.end) + path_cost_by_cell[neighbor]
 
                     priority_queue.push(neighbor, f)
                     parent_by_cell[neighbor] = curr
-            max_fringe_size = max(max_fringe_size, len(priority_queue.heap))
-
-        return PathFindingResult(list(visited.keys()), [], 0, 0, max_fringe_size)
+                    yield Expansion(neighbor, len(priority_queue.heap))
+
+        self._report(visited, priority_queue, found=False)
+
+    def _report(self, visited: set, priority_queue: PriorityQueue, found: bool) -> None:
+        heap_pushes = len(visited)
+        heap_pops = heap_pushes - len(priority_queue.heap)
+        _report_search(
+            current_counters(),
+            heap_pops - found,
+            heap_pushes - 1,
+            heap_pushes - 1,
+            heap_pushes=heap_pushes,
+            heap_pops=heap_pops,
+        )
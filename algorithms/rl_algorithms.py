@@ -0,0 +1,205 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from time import perf_counter
+
+import numpy as np
+
+from algorithms.instrumentation import Measurement
+from algorithms.mdp_algorithms import ValueIterationResult
+from models.direction import ACTIONS
+from models.maze import MdpMaze
+
+
+@dataclass(frozen=True)
+class RLResult(ValueIterationResult):
+    env_steps: int = 0
+    episodes: int = 0
+    steps_per_second: float = 0.0
+
+
+class VectorizedMazeEnv:
+    def __init__(
+        self,
+        maze: MdpMaze,
+        noise: float,
+        living_reward: float,
+        n_envs=64,
+        max_episode_steps: int | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.model = maze.compile_transitions(noise)
+        self.valid = self.model.successors >= 0
+        self.keep, _ = self.model.probabilities()
+        self.living_reward = living_reward
+        self.step_rewards = maze.step_rewards(living_reward)
+        self.terminals = maze.terminals
+        self.terminal_values = np.where(maze.terminals, maze.rewards, 0.0)
+        self.n_envs = n_envs
+        self.max_episode_steps = max_episode_steps or 4 * len(maze.values)
+        self.rng = np.random.default_rng(seed)
+
+        self.start = maze.state_of(maze.start)
+        self.states = np.full(n_envs, self.start, dtype=np.int64)
+        self.episode_steps = np.zeros(n_envs, dtype=np.int64)
+
+    def reset(self) -> np.ndarray:
+        self.states[:] = self.start
+        self.episode_steps[:] = 0
+        return self.states.copy()
+
+    def random_actions(self, states: np.ndarray) -> np.ndarray:
+        keys = self.rng.random((len(states), len(ACTIONS)))
+        keys[~self.valid[states]] = -1.0
+        return keys.argmax(axis=1)
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        model = self.model
+        states = self.states
+        rows = np.arange(self.n_envs)
+
+        slip = self.rng.random(self.n_envs) >= self.keep[states]
+        keys = self.rng.random((self.n_envs, len(ACTIONS)))
+        keys[~self.valid[states]] = -1.0
+        keys[rows, actions] = -1.0
+        taken = np.where(slip, keys.argmax(axis=1), actions)
+
+        next_states = model.successors[states, taken]
+        rewards = self.step_rewards[states]
+        dones = self.terminals[next_states]
+
+        self.episode_steps += 1
+        truncated = ~dones & (self.episode_steps >= self.max_episode_steps)
+        finished = dones | truncated
+
+        self.states = np.where(finished, self.start, next_states)
+        self.episode_steps[finished] = 0
+
+        return next_states, rewards, dones, truncated
+
+
+class TabularLearner(ABC):
+    def __init__(
+        self,
+        discount: float,
+        living_reward: float,
+        noise=0.2,
+        alpha=0.1,
+        epsilon=0.1,
+        n_envs=64,
+        env_steps=200_000,
+        seed: int | None = None,
+    ) -> None:
+        self.discount = discount
+        self.living_reward = living_reward
+        self.noise = noise
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.n_envs = n_envs
+        self.env_steps = env_steps
+        self.seed = seed
+
+    def solve(self, maze: MdpMaze, instrumentation='both') -> RLResult:
+        with Measurement(instrumentation) as measurement:
+            env = VectorizedMazeEnv(
+                maze, self.noise, self.living_reward, self.n_envs, seed=self.seed
+            )
+            Q = np.where(env.valid, 0.0, -np.inf)
+
+            iterations = max(self.env_steps // self.n_envs, 1)
+            train_start = perf_counter()
+            episodes = self._train(env, Q, iterations)
+            train_time = perf_counter() - train_start
+
+            greedy = Q.argmax(axis=1)
+            nonterminal = maze.updatable
+            maze.values[nonterminal] = Q[nonterminal, greedy[nonterminal]]
+            maze.policy[nonterminal] = greedy[nonterminal]
+
+        run_time, peak_mem = measurement.run_time, measurement.peak_memory
+        shortest_path = maze.shortest_path(maze.start, maze.end)
+        env_steps = iterations * self.n_envs
+
+        return RLResult(
+            [],
+            shortest_path,
+            run_time,
+            peak_mem,
+            iterations,
+            env_steps=env_steps,
+            episodes=episodes,
+            steps_per_second=env_steps / train_time if train_time > 0 else 0.0,
+        )
+
+    def _select_actions(
+        self, env: VectorizedMazeEnv, Q: np.ndarray, states: np.ndarray
+    ) -> np.ndarray:
+        explore = env.rng.random(len(states)) < self.epsilon
+        return np.where(explore, env.random_actions(states), Q[states].argmax(axis=1))
+
+    def _bootstrap(
+        self, env: VectorizedMazeEnv, next_states: np.ndarray, values: np.ndarray, dones
+    ):
+        return np.where(dones, env.terminal_values[next_states], values)
+
+    def _update(
+        self, Q: np.ndarray, states: np.ndarray, actions: np.ndarray, targets
+    ) -> None:
+        keys = states * Q.shape[1] + actions
+        unique_keys, inverse, counts = np.unique(
+            keys, return_inverse=True, return_counts=True
+        )
+        errors = np.bincount(inverse, weights=targets - Q[states, actions])
+        Q.flat[unique_keys] += self.alpha * errors / counts
+
+    @abstractmethod
+    def _train(self, env: VectorizedMazeEnv, Q: np.ndarray, iterations: int) -> int:
+        pass
+
+
+class QLearning(TabularLearner):
+    def _train(self, env: VectorizedMazeEnv, Q: np.ndarray, iterations: int) -> int:
+        states = env.reset()
+        episodes = 0
+
+        for _ in range(iterations):
+            actions = self._select_actions(env, Q, states)
+            next_states, rewards, dones, truncated = env.step(actions)
+
+            next_values = self._bootstrap(
+                env, next_states, Q[next_states].max(axis=1), dones
+            )
+            targets = rewards + self.discount * next_values
+            self._update(Q, states, actions, targets)
+
+            episodes += int(dones.sum() + truncated.sum())
+            states = env.states.copy()
+
+        return episodes
+
+
+class Sarsa(TabularLearner):
+    def _train(self, env: VectorizedMazeEnv, Q: np.ndarray, iterations: int) -> int:
+        states = env.reset()
+        actions = self._select_actions(env, Q, states)
+        episodes = 0
+
+        for _ in range(iterations):
+            next_states, rewards, dones, truncated = env.step(actions)
+            next_actions = self._select_actions(env, Q, next_states)
+
+            next_values = self._bootstrap(
+                env, next_states, Q[next_states, next_actions], dones
+            )
+            targets = rewards + self.discount * next_values
+            self._update(Q, states, actions, targets)
+
+            episodes += int(dones.sum() + truncated.sum())
+            reset = dones | truncated
+            states = env.states.copy()
+            actions = np.where(
+                reset, self._select_actions(env, Q, states), next_actions
+            )
+
+        return episodes
@@ -0,0 +1,145 @@
+import hashlib
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from models.cell import Open
+from models.maze import MdpMaze
+
+
+@dataclass(frozen=True)
+class CachedSolution:
+    algorithm: str
+    discount: float
+    noise: float
+    living_reward: float
+    values: np.ndarray
+    policy: np.ndarray
+    iterations: int
+    run_time: float
+
+    def distance(self, discount: float, noise: float, living_reward: float) -> float:
+        return (
+            abs(self.discount - discount)
+            + abs(self.noise - noise)
+            + abs(self.living_reward - living_reward)
+        )
+
+
+class SolutionCache:
+    def __init__(
+        self, tolerance: float = 0.1, path: str | None = None, reuse_exact=True
+    ) -> None:
+        self.tolerance = tolerance
+        self.path = path
+        self.reuse_exact = reuse_exact
+        self.solutions: dict[str, list[CachedSolution]] = {}
+        self._loaded: set[str] = set()
+
+    def store(
+        self,
+        maze: MdpMaze,
+        algorithm: str,
+        discount: float,
+        noise: float,
+        living_reward: float,
+        iterations: int,
+        run_time: float,
+    ) -> None:
+        solution = CachedSolution(
+            algorithm,
+            discount,
+            noise,
+            living_reward,
+            maze.values.copy(),
+            maze.policy.copy(),
+            iterations,
+            run_time,
+        )
+        key = maze_key(maze)
+        self.solutions.setdefault(key, []).append(solution)
+        if self.path is not None:
+            self._save(key, solution)
+
+    def lookup(
+        self,
+        maze: MdpMaze,
+        algorithm: str,
+        discount: float,
+        noise: float,
+        living_reward: float,
+    ) -> CachedSolution | None:
+        key = maze_key(maze)
+        if self.path is not None:
+            self._load(key)
+
+        candidates = [
+            s
+            for s in self.solutions.get(key, [])
+            if s.algorithm == algorithm
+            and s.distance(discount, noise, living_reward) <= self.tolerance
+            and (self.reuse_exact or s.distance(discount, noise, living_reward) > 0)
+        ]
+        if not candidates:
+            return None
+
+        return min(candidates, key=lambda s: s.distance(discount, noise, living_reward))
+
+    def _save(self, key: str, solution: CachedSolution) -> None:
+        directory = os.path.join(self.path, key)
+        os.makedirs(directory, exist_ok=True)
+        name = (
+            f'{solution.algorithm}_d{solution.discount}'
+            f'_n{solution.noise}_r{solution.living_reward}.npz'
+        )
+        partial = os.path.join(directory, f'.{os.getpid()}_{name}')
+        with open(partial, 'wb') as f:
+            np.savez(
+                f,
+                algorithm=solution.algorithm,
+                params=[solution.discount, solution.noise, solution.living_reward],
+                values=solution.values,
+                policy=solution.policy,
+                iterations=solution.iterations,
+                run_time=solution.run_time,
+            )
+        os.replace(partial, os.path.join(directory, name))
+        self._loaded.add(os.path.join(key, name))
+
+    def _load(self, key: str) -> None:
+        directory = os.path.join(self.path, key)
+        if not os.path.isdir(directory):
+            return
+
+        for name in sorted(os.listdir(directory)):
+            entry = os.path.join(key, name)
+            if name.startswith('.') or entry in self._loaded:
+                continue
+
+            with np.load(os.path.join(directory, name)) as data:
+                discount, noise, living_reward = data['params'].tolist()
+                solution = CachedSolution(
+                    str(data['algorithm']),
+                    discount,
+                    noise,
+                    living_reward,
+                    data['values'],
+                    data['policy'],
+                    int(data['iterations']),
+                    float(data['run_time']),
+                )
+            self.solutions.setdefault(key, []).append(solution)
+            self._loaded.add(entry)
+
+
+def maze_key(maze: MdpMaze) -> str:
+    layout = ''.join(
+        '1' if isinstance(cell, Open) else '0' for cell in maze.get_cells()
+    )
+    rows, cols = maze.dims()
+    key = f'{rows}x{cols}:{maze.start.coordinates()}:{maze.end.coordinates()}:{layout}'
+    digest = hashlib.sha1(key.encode())
+    digest.update(maze.rewards.tobytes())
+    digest.update(maze.terminals.tobytes())
+    return digest.hexdigest()
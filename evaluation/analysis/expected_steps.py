@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.sparse import csr_matrix, identity
+from scipy.sparse.csgraph import breadth_first_order
+from scipy.sparse.linalg import splu
+
+from models.direction import ACTIONS
+from models.maze import MdpMaze
+
+
+@dataclass(frozen=True)
+class ExpectedSteps:
+    steps: np.ndarray
+    variance: np.ndarray | None
+    start_steps: float
+    start_variance: float | None
+
+
+def expected_steps(maze: MdpMaze, noise: float, variance=False) -> ExpectedSteps:
+    model = maze.compile_transitions(noise)
+    n = len(maze.values)
+    transient = maze.updatable
+
+    policy = np.where(transient, maze.policy, 0)
+    is_intended = np.arange(len(ACTIONS))[None, :] == policy[:, None]
+    keep, spread = model.probabilities()
+    probabilities = np.where(is_intended, keep[:, None], spread[:, None])
+    mask = (model.successors >= 0) & transient[:, None] & (probabilities > 0)
+
+    rows = np.nonzero(mask)[0]
+    chain = csr_matrix(
+        (probabilities[mask], (rows, model.successors[mask])), shape=(n, n)
+    )
+
+    terminals = np.flatnonzero(maze.terminals)
+    reaches_goal = _reaching(chain, terminals, n)
+    doomed = np.flatnonzero(transient & ~reaches_goal)
+    finite = transient & reaches_goal & ~_reaching(chain, doomed, n)
+
+    steps = np.full(n, np.inf)
+    steps[terminals] = 0.0
+    var = np.full(n, np.inf) if variance else None
+    if var is not None:
+        var[terminals] = 0.0
+
+    idx = np.flatnonzero(finite)
+    if len(idx):
+        Q = chain[idx][:, idx]
+        lu = splu((identity(len(idx), format='csc') - Q).tocsc())
+        t = lu.solve(np.ones(len(idx)))
+        steps[idx] = t
+        if var is not None:
+            var[idx] = 2 * lu.solve(t) - t - t**2
+
+    start = maze.state_of(maze.start)
+    return ExpectedSteps(
+        steps,
+        var,
+        float(steps[start]),
+        float(var[start]) if var is not None else None,
+    )
+
+
+def _reaching(chain: csr_matrix, targets: np.ndarray, n: int) -> np.ndarray:
+    reached = np.zeros(n, dtype=bool)
+    if len(targets) == 0:
+        return reached
+
+    edges = chain.tocoo()
+    rows = np.concatenate([edges.col, np.full(len(targets), n)])
+    cols = np.concatenate([edges.row, targets])
+    reverse = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n + 1, n + 1))
+
+    order = breadth_first_order(reverse, n, directed=True, return_predecessors=False)
+    reached[order[order < n]] = True
+    return reached
@@ -1,17 +1,75 @@
+import copy
 import csv
+import itertools
+import math
+import multiprocessing as mp
 import os
+import random
+import re
+import tempfile
 import uuid
-from dataclasses import dataclass
+import zlib
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
+from typing import Generic, TypeVar
 
-from algorithms.mdp_algorithms import PolicyIteration, ValueIteration
-from algorithms.pathfinding_algorithms import (BFS, DFS, AStar,
-                                               chebyshev_distance,
-                                               euclidean_distance,
-                                               manhattan_distance)
+import numpy as np
+
+from algorithms.instrumentation import Counters, counting
+from algorithms.mdp_algorithms import (
+    LRTDP,
+    BatchValueIteration,
+    LRTDPResult,
+    MdpConfig,
+    PolicyIteration,
+    PolicyIterationResult,
+    ValueIteration,
+    ValueIterationResult,
+)
+from algorithms.parallel_mdp import ParallelValueIteration
+from algorithms.pathfinding_algorithms import (
+    BFS,
+    DFS,
+    AStar,
+    PathFindingResult,
+    chebyshev_distance,
+    euclidean_distance,
+    manhattan_distance,
+)
+from algorithms.rl_algorithms import QLearning, RLResult, Sarsa
+from algorithms.warm_start import SolutionCache
+from evaluation.analysis.expected_steps import ExpectedSteps, expected_steps
+from evaluation.experiment import Experiment, load_experiment
+from evaluation.profiling import profile_call, write_summary
+from evaluation.result_store import ResultStore, content_key
+from evaluation.supervisor import JobLimits, Outcome, enter_phase, run_supervised
 from models.maze import Maze, MdpMaze
 from util.maze_generation import generate_maze
 
+R = TypeVar('R')
+
 RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+JOB_KINDS = (
+    'pathfinding',
+    'mdp',
+    'stopping',
+    'parallel',
+    'reward_layouts',
+    'sweep',
+    'rl',
+)
+MDP_PARAMS = ('discount', 'reward', 'noise', 'dtype')
+JOB_PARAMS = {
+    'pathfinding': (),
+    'mdp': (*MDP_PARAMS, 'warm_start'),
+    'stopping': (*MDP_PARAMS, 'vi_stopping', 'vi_epsilon', 'vi_stable_sweeps'),
+    'parallel': (*MDP_PARAMS, 'vi_workers', 'vi_mode'),
+    'reward_layouts': (*MDP_PARAMS, 'reward_layouts'),
+    'sweep': ('sweep_configs', 'dtype'),
+    'rl': (*MDP_PARAMS, 'rl_steps'),
+}
 
 
 @dataclass(frozen=True)
@@ -20,64 +78,473 @@ class EvalRow:
     seed: int
     type: str
     algorithm: str
-    path_length: int
+    path_length: int | None
     visited: int | None
     total_iterations: int | None
     inner_iterations: int | None
     outer_iterations: int | None
     max_fringe_size: int | None
     runtime_s: float
-    memory_bytes: int
+    memory_bytes: int | None
+    iterations_saved: int | None = None
+    runtime_saved_s: float | None = None
+    steps_per_s: float | None = None
+    expected_steps: float | None = None
+    expected_steps_std: float | None = None
+    error_bound: float | None = None
+    runtime_iqr_s: float | None = None
+    repeats: int | None = None
+    generator: str | None = None
+    params: str | None = None
+    status: str = 'ok'
+    counters: dict[str, float] | None = None
+    phase: str | None = None
+
+
+@dataclass(frozen=True)
+class Instrumentation:
+    mode: str = 'both'
+    repeats: int = 1
+    warmup: int = 0
+    profile_dir: str | None = None
+    counters: bool = False
+    limits: JobLimits = field(default_factory=JobLimits)
+
+
+DEFAULT_INSTRUMENTATION = Instrumentation()
+
+
+@dataclass(frozen=True)
+class Measured(Generic[R]):
+    result: R
+    timed: list[R]
+    traced: R | None
+    runtime_iqr_s: float | None
+    memory_bytes: int | None
+    counters: dict[str, float] | None = None
+
+
+@dataclass(frozen=True)
+class EvalSettings:
+    generator: str
+    discount: float
+    reward: float
+    noise: float
+    warm_start: str
+    vi_workers: int
+    vi_mode: str
+    vi_stopping: str
+    vi_epsilon: float
+    vi_stable_sweeps: int
+    reward_layouts: int
+    sweep_configs: tuple[MdpConfig, ...]
+    rl_steps: int
+    dtype: str
+    instrumentation: Instrumentation
+    cache_dir: str | None = None
+
+
+@dataclass(frozen=True)
+class EvalJob:
+    size: int
+    seed: int | None
+    kind: str
+    settings: EvalSettings
 
 
 def run_eval(**kwargs):
-    sizes = [int(s) for s in kwargs['size'].split(',')]
-    generator = kwargs['generator']
+    experiment = load_experiment(kwargs['config']) if kwargs.get('config') else None
+    if experiment:
+        _check_experiment(experiment, kwargs)
+        kwargs = {**kwargs, **experiment.settings}
+
+    sizes = (experiment and experiment.sizes) or [
+        int(s) for s in kwargs['size'].split(',')
+    ]
     seed_arg = kwargs['seed']
-    noise = kwargs['noise']
-    discount = kwargs['discount']
-    reward = kwargs['reward']
     write_csv = kwargs['csv']
     run_pathfinding = kwargs['pathfinding']
     run_mdp = kwargs['mdp']
+    run_rl = kwargs['rl']
+    if experiment and experiment.solvers is not None:
+        run_pathfinding = 'pathfinding' in experiment.solvers
+        run_mdp = 'mdp' in experiment.solvers
+        run_rl = 'rl' in experiment.solvers
+    workers = kwargs['workers']
+    run_id = uuid.uuid4().hex[:8]
+    if kwargs.get('profile') and not kwargs.get('profile_dir'):
+        kwargs = {
+            **kwargs,
+            'profile_dir': os.path.join(RESULTS_DIR, 'profiles', run_id),
+        }
+    profile_dir = kwargs.get('profile_dir')
+    store = ResultStore(kwargs['store']) if kwargs.get('store') else None
+    generators = (experiment and experiment.generators) or [kwargs['generator']]
+    points = (experiment and experiment.grid) or [{}]
+    temp_cache = None
+    if not kwargs.get('cache_dir') and 'cache' in {
+        kwargs['warm_start'],
+        *(point.get('warm_start') for point in points),
+    }:
+        temp_cache = tempfile.TemporaryDirectory(prefix='solution_cache_')
+        kwargs = {**kwargs, 'cache_dir': temp_cache.name}
+    variants = {
+        generator: [
+            (_eval_settings({**kwargs, 'generator': generator, **point}), point)
+            for point in points
+        ]
+        for generator in generators
+    }
 
-    if not run_pathfinding and not run_mdp:
+    if not run_pathfinding and not run_mdp and not run_rl:
         run_pathfinding = True
         run_mdp = True
 
-    seeds = [int(s) for s in seed_arg.split(',')] if seed_arg else [None]
-    run_id = uuid.uuid4().hex[:8]
+    seeds = (experiment and experiment.seeds) or (
+        [int(s) for s in seed_arg.split(',')]
+        if seed_arg
+        else [random.SystemRandom().randrange(1, 2**31)]
+    )
 
     print(f'Run ID: {run_id}')
 
+    labels = {}
+    jobs = []
+    for generator, size, seed in itertools.product(generators, sizes, seeds):
+        for settings, point in variants[generator]:
+            labels[settings] = ', '.join(f'{k}={v}' for k, v in point.items())
+            jobs.extend(
+                EvalJob(size, seed, kind, settings)
+                for kind in _job_kinds(settings, run_pathfinding, run_mdp, run_rl)
+            )
+
+    keys = {job: _job_key(job) for job in jobs}
+    unique = list(dict.fromkeys(keys.values()))
+    completed = store.completed(unique) if store and not profile_dir else {}
+    if completed:
+        print(f'Reusing {len(completed)} of {len(unique)} jobs from {store.path}')
+
+    pending = {}
+    for job, key in keys.items():
+        if key not in completed:
+            pending.setdefault(key, job)
+    results = _run_jobs(list(pending.values()), workers)
+    finished = {}
+
+    def finished_rows(job: EvalJob) -> list[EvalRow]:
+        while keys[job] not in finished:
+            done, job_rows = next(results)
+            finished[keys[done]] = job_rows
+            if store and all(row.status == 'ok' for row in job_rows):
+                store.add(keys[done], asdict(done), [asdict(row) for row in job_rows])
+
+        return finished.pop(keys[job])
+
+    emitted = set()
     all_rows = []
-    for size in sizes:
-        for seed in seeds:
-            print(f'\n--- Size: {size}, Seed: {seed} ---')
-
-            raw_maze, start, end = generate_maze(size, size, generator, seed)
-
-            print(f'Maze: {size}x{size} | Generator: {generator} | Seed: {seed}')
-
-            rows = []
-            if run_pathfinding:
-                rows.extend(_run_pathfinding_eval(raw_maze, start, end, size, seed))
-            if run_mdp:
-                rows.extend(
-                    _run_mdp_eval(
-                        raw_maze, start, end, discount, reward, noise, size, seed
-                    )
-                )
+    for (settings, size, seed), cell_jobs in itertools.groupby(
+        jobs, key=lambda job: (job.settings, job.size, job.seed)
+    ):
+        print(f'\n--- Size: {size}, Seed: {seed} ---')
+        print(f'Maze: {size}x{size} | Generator: {settings.generator} | Seed: {seed}')
+        if labels[settings]:
+            print(f'Params: {labels[settings]}')
+
+        rows = []
+        for job in cell_jobs:
+            if keys[job] in emitted:
+                continue
 
-            _print_results(rows)
-            all_rows.extend(rows)
+            emitted.add(keys[job])
+            if keys[job] in completed:
+                job_rows = [EvalRow(**row) for row in completed[keys[job]]]
+            else:
+                job_rows = finished_rows(job)
+
+            rows.extend(
+                replace(row, generator=settings.generator, params=labels[settings])
+                for row in job_rows
+            )
 
+        _print_results(rows)
+        all_rows.extend(rows)
+
+    if store:
+        store.close()
+    if temp_cache:
+        temp_cache.cleanup()
+    if profile_dir:
+        summary = write_summary(profile_dir)
+        if summary:
+            print(f'\n=== Profile ({profile_dir}) ===\n')
+            print(summary)
     if write_csv:
-        _write_csv(all_rows, generator, run_id)
+        _write_csv(all_rows, experiment.name if experiment else generators[0], run_id)
+
+
+def _eval_settings(kwargs: dict) -> EvalSettings:
+    return EvalSettings(
+        generator=kwargs['generator'],
+        discount=kwargs['discount'],
+        reward=kwargs['reward'],
+        noise=kwargs['noise'],
+        warm_start=kwargs['warm_start'],
+        vi_workers=kwargs['vi_workers'],
+        vi_mode=kwargs['vi_mode'],
+        vi_stopping=kwargs['vi_stopping'],
+        vi_epsilon=kwargs['vi_epsilon'],
+        vi_stable_sweeps=kwargs['vi_stable_sweeps'],
+        reward_layouts=kwargs['reward_layouts'],
+        sweep_configs=_sweep_configs(
+            kwargs['sweep_discount'],
+            kwargs['sweep_noise'],
+            kwargs['sweep_reward'],
+            kwargs['discount'],
+            kwargs['noise'],
+            kwargs['reward'],
+        ),
+        rl_steps=kwargs['rl_steps'],
+        dtype=kwargs['dtype'],
+        instrumentation=Instrumentation(
+            kwargs['instrumentation'],
+            kwargs['repeats'],
+            kwargs['warmup'],
+            kwargs.get('profile_dir'),
+            kwargs.get('counters', False),
+            JobLimits(
+                kwargs.get('timeout'),
+                kwargs['memory_limit'] * 2**20 if kwargs.get('memory_limit') else None,
+            ),
+        ),
+        cache_dir=kwargs.get('cache_dir'),
+    )
+
+
+def _check_experiment(experiment: Experiment, kwargs: dict) -> None:
+    names = set(experiment.settings).union(*experiment.grid)
+    unknown = sorted(names - set(kwargs) - {'generator'})
+    if unknown:
+        raise ValueError(f'Unknown eval settings {unknown} in {experiment.name}')
+
+
+def _job_kinds(
+    settings: EvalSettings, run_pathfinding: bool, run_mdp: bool, run_rl: bool
+) -> list[str]:
+    enabled = {
+        'pathfinding': run_pathfinding,
+        'mdp': run_mdp,
+        'stopping': run_mdp and settings.vi_stopping != 'residual',
+        'parallel': run_mdp and bool(settings.vi_workers),
+        'reward_layouts': run_mdp and bool(settings.reward_layouts),
+        'sweep': run_mdp and bool(settings.sweep_configs),
+        'rl': run_rl,
+    }
+    return [kind for kind in JOB_KINDS if enabled[kind]]
+
+
+def _job_key(job: EvalJob) -> str:
+    fields = asdict(job.settings)
+    return content_key(
+        {
+            'generator': job.settings.generator,
+            'size': job.size,
+            'seed': job.seed,
+            'kind': job.kind,
+            'params': {name: fields[name] for name in JOB_PARAMS[job.kind]},
+            'instrumentation': {
+                **fields['instrumentation'],
+                'profile_dir': None,
+                'limits': None,
+            },
+        }
+    )
+
+
+def _run_jobs(
+    jobs: list[EvalJob], workers: int
+) -> Iterator[tuple[EvalJob, list[EvalRow]]]:
+    if workers <= 1:
+        for job in jobs:
+            yield job, _run_job(job)
+        return
+
+    context = mp.get_context()
+    with ProcessPoolExecutor(
+        min(workers, len(jobs)),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(context.Value('i', 0), _pinned_cpus(jobs)),
+    ) as pool:
+        futures = {pool.submit(_run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _pinned_cpus(jobs: list[EvalJob]) -> list[int]:
+    if not hasattr(os, 'sched_getaffinity'):
+        return []
+    if any(job.settings.vi_workers for job in jobs):
+        return []
+
+    return sorted(os.sched_getaffinity(0))
+
+
+def _solver_rows(
+    instrumentation: Instrumentation,
+    size: int,
+    seed: int | None,
+    type: str,
+    name: str,
+    solve_rows: Callable[[], list[EvalRow]],
+) -> list[EvalRow]:
+    def seeded_rows() -> list[EvalRow]:
+        _seed_solver(size, seed, name)
+        return solve_rows()
+
+    if not instrumentation.limits.enabled:
+        return seeded_rows()
+
+    outcome = run_supervised(seeded_rows, (), instrumentation.limits)
+    if outcome.status == 'ok':
+        return outcome.value
+
+    return [_failed_row(size, seed, type, name, outcome)]
+
+
+def _seed_solver(size: int, seed: int | None, name: str) -> None:
+    sequence = np.random.SeedSequence([size, seed or 0, zlib.crc32(name.encode())])
+    state = sequence.generate_state(1)[0]
+    random.seed(int(state))
+    np.random.seed(state)
+
+
+def _failed_row(
+    size: int, seed: int | None, type: str, name: str, outcome: Outcome
+) -> EvalRow:
+    return EvalRow(
+        size=size,
+        seed=seed,
+        type=type,
+        algorithm=name,
+        path_length=None,
+        visited=None,
+        total_iterations=None,
+        inner_iterations=None,
+        outer_iterations=None,
+        max_fringe_size=None,
+        runtime_s=outcome.run_time,
+        memory_bytes=outcome.peak_rss_bytes,
+        status=outcome.status,
+        phase=outcome.phase,
+    )
+
+
+def _init_worker(slots, cpus: list[int]) -> None:
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+
+    if cpus:
+        os.sched_setaffinity(0, {cpus[slot % len(cpus)]})
+
+
+def _run_job(job: EvalJob) -> list[EvalRow]:
+    s = job.settings
+    maze_args = _job_maze(s.generator, job.size, job.seed)
+    cell = (job.size, job.seed)
+    measure = s.instrumentation
+    if measure.profile_dir:
+        measure = replace(
+            measure, profile_dir=os.path.join(measure.profile_dir, _profile_cell(job))
+        )
+
+    if job.kind == 'pathfinding':
+        return _run_pathfinding_eval(*maze_args, *cell, measure)
+    if job.kind == 'mdp':
+        return _run_mdp_eval(
+            *maze_args,
+            s.discount,
+            s.reward,
+            s.noise,
+            *cell,
+            s.warm_start,
+            s.cache_dir,
+            s.dtype,
+            measure,
+        )
+    if job.kind == 'stopping':
+        return _run_stopping_eval(
+            *maze_args,
+            s.discount,
+            s.reward,
+            s.noise,
+            s.vi_stopping,
+            s.vi_epsilon,
+            s.vi_stable_sweeps,
+            *cell,
+            s.dtype,
+            measure,
+        )
+    if job.kind == 'parallel':
+        return _run_parallel_eval(
+            *maze_args,
+            s.discount,
+            s.reward,
+            s.noise,
+            s.vi_workers,
+            s.vi_mode,
+            *cell,
+            s.dtype,
+            measure,
+        )
+    if job.kind == 'reward_layouts':
+        return _run_reward_layout_eval(
+            *maze_args,
+            s.discount,
+            s.reward,
+            s.noise,
+            s.reward_layouts,
+            *cell,
+            s.dtype,
+            measure,
+        )
+    if job.kind == 'sweep':
+        return _run_sweep_eval(*maze_args, s.sweep_configs, *cell, s.dtype, measure)
+    if job.kind == 'rl':
+        return _run_rl_eval(
+            *maze_args,
+            s.discount,
+            s.reward,
+            s.noise,
+            s.rl_steps,
+            *cell,
+            s.dtype,
+            measure,
+        )
+
+    raise ValueError(f'Unknown evaluation job kind {job.kind!r}')
+
+
+def _profile_cell(job: EvalJob) -> str:
+    s = job.settings
+    return (
+        f'{s.generator}_size{job.size}_seed{job.seed}'
+        f'_d{s.discount}_n{s.noise}_r{s.reward}'
+    )
+
+
+@lru_cache(maxsize=1)
+def _job_maze(generator: str, size: int, seed: int) -> tuple:
+    return generate_maze(size, size, generator, seed)
 
 
 def _run_pathfinding_eval(
-    raw_maze, start, end, size: int, seed: int | None
+    raw_maze,
+    start,
+    end,
+    size: int,
+    seed: int | None,
+    instrumentation=DEFAULT_INSTRUMENTATION,
 ) -> list[EvalRow]:
     maze = Maze(raw_maze, start, end, cell_size=1)
 
@@ -89,11 +556,13 @@ def _run_pathfinding_eval(
         ('A* (Chebyshev)', AStar(heuristic=chebyshev_distance)),
     ]
 
-    rows = []
-    for name, solver in solvers:
-        result = solver.solve(maze, maze.start)
-        rows.append(
-            EvalRow(
+    def pathfinding_rows(name: str, solver) -> list[EvalRow]:
+        def solve_rows() -> list[EvalRow]:
+            measured = _measure(
+                instrumentation, lambda mode: solver.solve(maze, maze.start, mode), name
+            )
+            result = measured.result
+            row = EvalRow(
                 size=size,
                 seed=seed,
                 type='pathfinding',
@@ -105,64 +574,561 @@ def _run_pathfinding_eval(
                 outer_iterations=None,
                 max_fringe_size=result.max_fringe_size,
                 runtime_s=result.run_time,
-                memory_bytes=result.peak_memory_bytes,
+                memory_bytes=None,
             )
+            return [_with_measurement(row, measured)]
+
+        return _solver_rows(
+            instrumentation, size, seed, 'pathfinding', name, solve_rows
         )
 
-    return rows
+    return [row for name, solver in solvers for row in pathfinding_rows(name, solver)]
 
 
 def _run_mdp_eval(
-    raw_maze, start, end, discount, reward, noise, size: int, seed: int | None
+    raw_maze,
+    start,
+    end,
+    discount,
+    reward,
+    noise,
+    size: int,
+    seed: int | None,
+    warm_start: str = 'cold',
+    cache_dir: str | None = None,
+    dtype='float64',
+    instrumentation=DEFAULT_INSTRUMENTATION,
 ) -> list[EvalRow]:
-    maze = MdpMaze(raw_maze, start, end, cell_size=1)
-    maze.init_states(initial_value=0, goal_reward=10)
+    cache = (
+        SolutionCache(path=cache_dir, reuse_exact=False)
+        if warm_start == 'cache'
+        else None
+    )
+    maze_args = (raw_maze, start, end, noise, dtype, instrumentation)
 
-    vi = ValueIteration(discount, reward, noise)
-    vi_result = vi.solve(maze, take_snapshots=False)
+    def mdp_rows(name: str, solver, make_row=_vi_row) -> list[EvalRow]:
+        def solve_rows() -> list[EvalRow]:
+            measured, steps = _solve_mdp(name, solver, *maze_args)
+            return [make_row(size, seed, name, measured.result, steps, measured)]
 
-    maze_pi = MdpMaze(raw_maze, start, end, cell_size=1)
-    maze_pi.init_states(initial_value=0, goal_reward=10)
+        return _solver_rows(instrumentation, size, seed, 'mdp', name, solve_rows)
 
-    pi = PolicyIteration(discount, reward, noise, theta=0.0001)
-    pi_result = pi.solve(maze_pi, take_snapshots=False)
+    def lrtdp_rows() -> list[EvalRow]:
+        lrtdp = LRTDP(discount, reward, noise, heuristic='bfs', seed=seed)
+        measured, steps = _solve_mdp('LRTDP', lrtdp, *maze_args)
+        result: LRTDPResult = measured.result
+        print(
+            f'LRTDP touched {result.touched_states} states,'
+            f' {result.untouched_states} never touched,'
+            f' {result.backups} backups'
+        )
+        return [
+            replace(
+                _vi_row(size, seed, 'LRTDP', result, steps, measured),
+                visited=result.touched_states,
+            )
+        ]
 
-    return [
-        EvalRow(
+    vi_rows = mdp_rows(
+        'Value Iteration', ValueIteration(discount, reward, noise, cache=cache)
+    )
+    pi_rows = mdp_rows(
+        'Policy Iteration',
+        PolicyIteration(discount, reward, noise, theta=0.0001, cache=cache),
+        _pi_row,
+    )
+    rows = [
+        *vi_rows,
+        *pi_rows,
+        *_solver_rows(instrumentation, size, seed, 'mdp', 'LRTDP', lrtdp_rows),
+    ]
+
+    if warm_start != 'cold':
+        warm_vi = ValueIteration(
+            discount, reward, noise, warm_start=warm_start, cache=cache
+        )
+        warm_pi = PolicyIteration(
+            discount, reward, noise, theta=0.0001, warm_start=warm_start, cache=cache
+        )
+        rows += _with_baseline(
+            mdp_rows(f'Value Iteration ({warm_start})', warm_vi), vi_rows
+        )
+        rows += _with_baseline(
+            mdp_rows(f'Policy Iteration ({warm_start})', warm_pi, _pi_row), pi_rows
+        )
+
+    return rows
+
+
+def _run_stopping_eval(
+    raw_maze,
+    start,
+    end,
+    discount,
+    reward,
+    noise,
+    stopping: str,
+    epsilon: float,
+    stable_sweeps: int,
+    size: int,
+    seed: int | None,
+    dtype='float64',
+    instrumentation=DEFAULT_INSTRUMENTATION,
+) -> list[EvalRow]:
+    maze_args = (raw_maze, start, end, noise, dtype, instrumentation)
+    baseline_name = 'Value Iteration (stopping baseline)'
+    name = f'Value Iteration ({stopping})'
+
+    def baseline_rows() -> list[EvalRow]:
+        baseline = ValueIteration(discount, reward, noise)
+        measured, _ = _solve_mdp(baseline_name, baseline, *maze_args)
+        return [_vi_row(size, seed, baseline_name, measured.result)]
+
+    def stopping_rows() -> list[EvalRow]:
+        vi = ValueIteration(
+            discount,
+            reward,
+            noise,
+            stopping=stopping,
+            epsilon=epsilon,
+            stable_sweeps=stable_sweeps,
+        )
+        measured, steps = _solve_mdp(name, vi, *maze_args)
+        result = measured.result
+
+        last = result.trace[-1]
+        print(
+            f'VI ({stopping}) stopped after {result.iterations} sweeps:'
+            f' residual {last.residual:.2e}, span {last.span:.2e},'
+            f' policy changes {last.policy_changes}'
+        )
+        return [_vi_row(size, seed, name, result, steps, measured)]
+
+    baseline = _solver_rows(
+        instrumentation, size, seed, 'mdp', baseline_name, baseline_rows
+    )
+    rows = _solver_rows(instrumentation, size, seed, 'mdp', name, stopping_rows)
+    return _with_baseline(rows, baseline)
+
+
+def _run_reward_layout_eval(
+    raw_maze,
+    start,
+    end,
+    discount,
+    reward,
+    noise,
+    layouts: int,
+    size: int,
+    seed: int | None,
+    dtype='float64',
+    instrumentation=DEFAULT_INSTRUMENTATION,
+) -> list[EvalRow]:
+    maze = _mdp_maze(raw_maze, start, end, dtype)
+    maze.compile_transitions(noise)
+    rng = np.random.default_rng(seed)
+
+    def layout_rows(k: int) -> list[EvalRow]:
+        maze.values[:] = 0
+        maze.set_reward_map(*_random_reward_map(maze, rng, goal_reward=10))
+        values, policy = maze.values.copy(), maze.policy.copy()
+        exits = int(maze.terminals.sum())
+        penalties = int((maze.rewards[~maze.terminals] < 0).sum())
+        name = f'VI layout {k} ({exits} exits, {penalties} penalties)'
+
+        def solve(mode: str) -> ValueIterationResult:
+            maze.values[:] = values
+            maze.policy[:] = policy
+            return ValueIteration(discount, reward, noise).solve(
+                maze, take_snapshots=False, instrumentation=mode
+            )
+
+        def solve_rows() -> list[EvalRow]:
+            measured = _measure(instrumentation, solve, f'VI layout {k}')
+            steps = expected_steps(maze, noise, variance=True)
+            return [_vi_row(size, seed, name, measured.result, steps, measured)]
+
+        return _solver_rows(instrumentation, size, seed, 'mdp', name, solve_rows)
+
+    return [row for k in range(layouts) for row in layout_rows(k)]
+
+
+def _random_reward_map(
+    maze: MdpMaze, rng: np.random.Generator, goal_reward: float
+) -> tuple[np.ndarray, np.ndarray]:
+    rewards, terminals = maze.goal_reward_map(goal_reward)
+    candidates = [
+        c.coordinates()
+        for c in maze.get_open_cells()
+        if c not in (maze.start, maze.end)
+    ]
+    picks = rng.permutation(len(candidates))
+
+    n_exits = int(rng.integers(0, 3))
+    n_penalties = max(len(candidates) // 20, 1)
+    for i in picks[:n_exits]:
+        rewards[candidates[i]] = goal_reward * rng.uniform(0.2, 1.0)
+        terminals[candidates[i]] = True
+    for i in picks[n_exits : n_exits + n_penalties]:
+        rewards[candidates[i]] = -goal_reward * rng.uniform(0.01, 0.1)
+
+    return rewards, terminals
+
+
+def _sweep_configs(
+    discounts: str | None,
+    noises: str | None,
+    rewards: str | None,
+    discount: float,
+    noise: float,
+    reward: float,
+) -> tuple[MdpConfig, ...]:
+    if not discounts and not noises and not rewards:
+        return ()
+
+    def parse(values: str | None, default: float) -> list[float]:
+        return [float(v) for v in values.split(',')] if values else [default]
+
+    return tuple(
+        MdpConfig(d, n, r)
+        for d, n, r in itertools.product(
+            parse(discounts, discount), parse(noises, noise), parse(rewards, reward)
+        )
+    )
+
+
+def _run_sweep_eval(
+    raw_maze,
+    start,
+    end,
+    configs: tuple[MdpConfig, ...],
+    size: int,
+    seed: int | None,
+    dtype='float64',
+    instrumentation=DEFAULT_INSTRUMENTATION,
+) -> list[EvalRow]:
+    maze = _mdp_maze(raw_maze, start, end, dtype)
+
+    def solve_rows() -> list[EvalRow]:
+        batch = _measure(
+            instrumentation,
+            lambda mode: BatchValueIteration(list(configs)).solve(
+                copy.deepcopy(maze), mode
+            ),
+            'Batch VI',
+        )
+
+        batch_row = EvalRow(
             size=size,
             seed=seed,
-            type='mdp',
-            algorithm='Value Iteration',
-            path_length=len(vi_result.shortest_path),
+            type='batch',
+            algorithm=f'Batch VI ({len(configs)} configs)',
+            path_length=None,
             visited=None,
-            total_iterations=vi_result.iterations,
+            total_iterations=batch.result.sweeps,
             inner_iterations=None,
             outer_iterations=None,
             max_fringe_size=None,
-            runtime_s=vi_result.run_time,
-            memory_bytes=vi_result.peak_memory,
-        ),
-        EvalRow(
-            size=size,
-            seed=seed,
-            type='mdp',
-            algorithm='Policy Iteration',
-            path_length=len(pi_result.shortest_path),
-            visited=None,
-            total_iterations=pi_result.total_eval_iterations
-            + pi_result.total_improve_iterations,
-            inner_iterations=pi_result.total_eval_iterations,
-            outer_iterations=pi_result.total_improve_iterations,
-            max_fringe_size=None,
-            runtime_s=pi_result.run_time,
-            memory_bytes=pi_result.peak_memory,
+            runtime_s=batch.result.run_time,
+            memory_bytes=batch.result.peak_memory,
+        )
+        rows = [_with_measurement(batch_row, batch)]
+        for k, c in enumerate(configs):
+            measured = _summarize(
+                [run.results[k] for run in batch.timed],
+                batch.traced.results[k] if batch.traced is not None else None,
+            )
+            rows.append(
+                _vi_row(
+                    size,
+                    seed,
+                    f'Batch VI (d={c.discount}, n={c.noise}, r={c.living_reward})',
+                    measured.result,
+                    measured=measured,
+                )
+            )
+
+        return rows
+
+    return _solver_rows(instrumentation, size, seed, 'mdp', 'Batch VI', solve_rows)
+
+
+def _run_parallel_eval(
+    raw_maze,
+    start,
+    end,
+    discount,
+    reward,
+    noise,
+    workers: int,
+    mode: str,
+    size: int,
+    seed: int | None,
+    dtype='float64',
+    instrumentation=DEFAULT_INSTRUMENTATION,
+) -> list[EvalRow]:
+    maze = _mdp_maze(raw_maze, start, end, dtype)
+    name = f'Parallel VI ({mode}, {workers} workers)'
+
+    def solve_rows() -> list[EvalRow]:
+        solver = ParallelValueIteration(
+            discount, reward, noise, workers=workers, mode=mode
+        )
+        measured = _measure(
+            instrumentation,
+            lambda run_mode: solver.solve(copy.deepcopy(maze), run_mode),
+            f'Parallel VI ({mode})',
+        )
+        result = measured.result
+
+        worker_times = ', '.join(f'{t:.4f}s' for t in result.worker_times)
+        print(f'Parallel VI ({mode}) worker times: {worker_times}')
+
+        return [_vi_row(size, seed, name, result, measured=measured)]
+
+    return _solver_rows(instrumentation, size, seed, 'mdp', name, solve_rows)
+
+
+def _run_rl_eval(
+    raw_maze,
+    start,
+    end,
+    discount,
+    reward,
+    noise,
+    env_steps: int,
+    size: int,
+    seed: int | None,
+    dtype='float64',
+    instrumentation=DEFAULT_INSTRUMENTATION,
+) -> list[EvalRow]:
+    learners = [
+        (
+            'Q-Learning',
+            QLearning(discount, reward, noise, env_steps=env_steps, seed=seed),
         ),
+        ('SARSA', Sarsa(discount, reward, noise, env_steps=env_steps, seed=seed)),
+    ]
+
+    def learner_rows(name: str, learner) -> list[EvalRow]:
+        template = _mdp_maze(raw_maze, start, end, dtype)
+        mazes = [template]
+
+        def solve(mode: str) -> RLResult:
+            mazes[:] = [copy.deepcopy(template)]
+            return learner.solve(mazes[0], mode)
+
+        def solve_rows() -> list[EvalRow]:
+            measured = _measure(instrumentation, solve, name)
+            result: RLResult = measured.result
+            row = _vi_row(
+                size,
+                seed,
+                name,
+                result,
+                expected_steps(mazes[0], noise, variance=True),
+                measured,
+            )
+            return [
+                replace(
+                    row,
+                    type='rl',
+                    total_iterations=result.env_steps,
+                    steps_per_s=result.steps_per_second,
+                )
+            ]
+
+        return _solver_rows(instrumentation, size, seed, 'rl', name, solve_rows)
+
+    return [row for name, learner in learners for row in learner_rows(name, learner)]
+
+
+def _mdp_maze(raw_maze, start, end, dtype='float64') -> MdpMaze:
+    maze = MdpMaze(raw_maze, start, end, cell_size=1, dtype=dtype)
+    maze.init_states(initial_value=0, goal_reward=10)
+    return maze
+
+
+def _solve_mdp(
+    name: str,
+    solver,
+    raw_maze,
+    start,
+    end,
+    noise,
+    dtype='float64',
+    instrumentation=DEFAULT_INSTRUMENTATION,
+):
+    template = _mdp_maze(raw_maze, start, end, dtype)
+    mazes = [template]
+
+    def solve(mode: str):
+        mazes[:] = [copy.deepcopy(template)]
+        return solver.solve(mazes[0], take_snapshots=False, instrumentation=mode)
+
+    measured = _measure(instrumentation, solve, name)
+    return measured, expected_steps(mazes[0], noise, variance=True)
+
+
+def _measure(
+    instrumentation: Instrumentation, solve: Callable[[str], R], name: str
+) -> Measured[R]:
+    timed = []
+    if instrumentation.mode != 'memory':
+        for i in range(instrumentation.warmup):
+            enter_phase(f'warmup {i + 1}/{instrumentation.warmup}')
+            solve('timing')
+
+        repeats = max(instrumentation.repeats, 1)
+        for i in range(repeats):
+            enter_phase(f'repeat {i + 1}/{repeats}')
+            timed.append(solve('timing'))
+
+    traced = None
+    if instrumentation.mode != 'timing':
+        enter_phase('memory')
+        traced = solve('memory')
+
+    if instrumentation.profile_dir:
+        enter_phase('profile')
+        profile_call(
+            lambda: solve('timing'),
+            os.path.join(instrumentation.profile_dir, _file_name(name)),
+        )
+
+    measured = _summarize(timed, traced)
+    if instrumentation.counters:
+        enter_phase('counters')
+        with counting(Counters()) as counters:
+            solve('timing')
+        measured = replace(measured, counters=counters.as_dict())
+
+    enter_phase('analysis')
+    return measured
+
+
+def _file_name(name: str) -> str:
+    return re.sub(r'[^a-z0-9.]+', '_', name.lower()).strip('_')
+
+
+def _summarize(timed: list[R], traced: R | None) -> Measured[R]:
+    runs = timed or [traced]
+    q1, median, q3 = np.percentile([run.run_time for run in runs], [25, 50, 75])
+    return Measured(
+        replace(runs[-1], run_time=float(median)),
+        timed,
+        traced,
+        float(q3 - q1) if timed else None,
+        _peak_memory(traced) if traced is not None else None,
+    )
+
+
+def _peak_memory(result) -> int:
+    if isinstance(result, PathFindingResult):
+        return result.peak_memory_bytes
+    return result.peak_memory
+
+
+def _with_measurement(row: EvalRow, measured: Measured | None) -> EvalRow:
+    if measured is None:
+        return row
+
+    return replace(
+        row,
+        memory_bytes=measured.memory_bytes,
+        runtime_iqr_s=measured.runtime_iqr_s,
+        repeats=len(measured.timed),
+        counters=measured.counters,
+    )
+
+
+def _std(variance: float | None) -> float | None:
+    if variance is None:
+        return None
+    return math.sqrt(max(variance, 0.0))
+
+
+def _with_baseline(rows: list[EvalRow], baseline: list[EvalRow]) -> list[EvalRow]:
+    if not baseline or baseline[0].status != 'ok':
+        return rows
+
+    return [
+        replace(
+            row,
+            iterations_saved=baseline[0].total_iterations - row.total_iterations,
+            runtime_saved_s=baseline[0].runtime_s - row.runtime_s,
+        )
+        if row.status == 'ok'
+        else row
+        for row in rows
     ]
 
 
+def _vi_row(
+    size: int,
+    seed: int | None,
+    name: str,
+    result: ValueIterationResult,
+    steps: ExpectedSteps | None = None,
+    measured: Measured | None = None,
+) -> EvalRow:
+    row = EvalRow(
+        size=size,
+        seed=seed,
+        type='mdp',
+        algorithm=name,
+        path_length=len(result.shortest_path),
+        visited=None,
+        total_iterations=result.iterations,
+        inner_iterations=None,
+        outer_iterations=None,
+        max_fringe_size=None,
+        runtime_s=result.run_time,
+        memory_bytes=result.peak_memory,
+        iterations_saved=result.iterations_saved,
+        runtime_saved_s=result.run_time_saved,
+        expected_steps=steps.start_steps if steps else None,
+        expected_steps_std=_std(steps.start_variance) if steps else None,
+        error_bound=result.error_bound,
+    )
+    return _with_measurement(row, measured)
+
+
+def _pi_row(
+    size: int,
+    seed: int | None,
+    name: str,
+    result: PolicyIterationResult,
+    steps: ExpectedSteps | None = None,
+    measured: Measured | None = None,
+) -> EvalRow:
+    row = EvalRow(
+        size=size,
+        seed=seed,
+        type='mdp',
+        algorithm=name,
+        path_length=len(result.shortest_path),
+        visited=None,
+        total_iterations=result.total_eval_iterations + result.total_improve_iterations,
+        inner_iterations=result.total_eval_iterations,
+        outer_iterations=result.total_improve_iterations,
+        max_fringe_size=None,
+        runtime_s=result.run_time,
+        memory_bytes=result.peak_memory,
+        iterations_saved=result.iterations_saved,
+        runtime_saved_s=result.run_time_saved,
+        expected_steps=steps.start_steps if steps else None,
+        expected_steps_std=_std(steps.start_variance) if steps else None,
+    )
+    return _with_measurement(row, measured)
+
+
 def _print_results(rows: list[EvalRow]) -> None:
-    pf_rows = [r for r in rows if r.type == 'pathfinding']
-    mdp_rows = [r for r in rows if r.type == 'mdp']
+    ok_rows = [r for r in rows if r.status == 'ok']
+    failed_rows = [r for r in rows if r.status != 'ok']
+    pf_rows = [r for r in ok_rows if r.type == 'pathfinding']
+    mdp_rows = [r for r in ok_rows if r.type == 'mdp']
+    rl_rows = [r for r in ok_rows if r.type == 'rl']
 
     if pf_rows:
         print('\n=== Pathfinding ===\n')
@@ -176,34 +1142,85 @@ def _print_results(rows: list[EvalRow]) -> None:
                 f' {r.visited:>8}'
                 f' {r.max_fringe_size:>13}'
                 f' {r.runtime_s:>9.4f}s'
-                f' {r.memory_bytes:>8} B'
+                f' {_memory(r):>10}'
             )
 
     if mdp_rows:
         print('\n=== MDP ===\n')
         print(
-            f'{"Algorithm":<22} {"Path Length":>11} {"Total":>6}'
+            f'{"Algorithm":<36} {"Path Length":>11} {"Total":>6}'
             f' {"Inner":>6} {"Outer":>6}'
-            f' {"Runtime":>10} {"Memory":>10}'
+            f' {"Runtime":>10} {"Memory":>10} {"Saved":>6} {"E[Steps]":>10}'
+            f' {"Bound":>10}'
         )
         for r in mdp_rows:
             inner = str(r.inner_iterations) if r.inner_iterations is not None else ''
             outer = str(r.outer_iterations) if r.outer_iterations is not None else ''
+            saved = str(r.iterations_saved) if r.iterations_saved is not None else ''
+            exp_steps = (
+                f'{r.expected_steps:.2f}' if r.expected_steps is not None else ''
+            )
+            bound = f'{r.error_bound:.2e}' if r.error_bound is not None else ''
             print(
-                f'{r.algorithm:<22} {r.path_length:>11}'
+                f'{r.algorithm:<36} {r.path_length:>11}'
                 f' {r.total_iterations:>6}'
                 f' {inner:>6}'
                 f' {outer:>6}'
                 f' {r.runtime_s:>9.4f}s'
-                f' {r.memory_bytes:>8} B'
+                f' {_memory(r):>10}'
+                f' {saved:>6}'
+                f' {exp_steps:>10}'
+                f' {bound:>10}'
+            )
+
+    if rl_rows:
+        print('\n=== Reinforcement Learning ===\n')
+        print(
+            f'{"Algorithm":<22} {"Path Length":>11} {"Env Steps":>10}'
+            f' {"Steps/s":>12} {"Runtime":>10} {"Memory":>10}'
+        )
+        for r in rl_rows:
+            print(
+                f'{r.algorithm:<22} {r.path_length:>11}'
+                f' {r.total_iterations:>10}'
+                f' {r.steps_per_s:>12.0f}'
+                f' {r.runtime_s:>9.4f}s'
+                f' {_memory(r):>10}'
             )
 
+    if failed_rows:
+        print('\n=== Failed ===\n')
+        print(
+            f'{"Job":<36} {"Status":>11} {"Phase":>12} {"Runtime":>10} {"Peak RSS":>10}'
+        )
+        for r in failed_rows:
+            print(
+                f'{r.algorithm:<36} {r.status:>11} {r.phase or "-":>12}'
+                f' {r.runtime_s:>9.4f}s'
+                f' {_memory(r):>10}'
+            )
+
+    counter_rows = [r for r in ok_rows if r.counters]
+    if counter_rows:
+        print('\n=== Counters ===\n')
+        for r in counter_rows:
+            counts = ', '.join(
+                f'{name}={value:.4f}' if name.endswith('_s') else f'{name}={value}'
+                for name, value in r.counters.items()
+            )
+            print(f'{r.algorithm:<36} {counts}')
+
+
+def _memory(row: EvalRow) -> str:
+    return f'{row.memory_bytes} B' if row.memory_bytes is not None else ''
+
 
-def _write_csv(rows: list[EvalRow], generator: str, run_id: str) -> None:
+def _write_csv(rows: list[EvalRow], name: str, run_id: str) -> None:
     os.makedirs(RESULTS_DIR, exist_ok=True)
 
-    filename = f'{run_id}_eval_{generator}.csv'
+    filename = f'{run_id}_eval_{name}.csv'
     filepath = os.path.join(RESULTS_DIR, filename)
+    counter_names = sorted(set().union(*(r.counters or {} for r in rows)))
 
     with open(filepath, 'w', newline='') as f:
         writer = csv.writer(f)
@@ -220,7 +1237,20 @@ def _write_csv(rows: list[EvalRow], generator: str, run_id: str) -> None:
                 'outer_iterations',
                 'max_fringe_size',
                 'runtime_s',
+                'runtime_iqr_s',
+                'repeats',
                 'memory_bytes',
+                'iterations_saved',
+                'runtime_saved_s',
+                'steps_per_s',
+                'expected_steps',
+                'expected_steps_std',
+                'error_bound',
+                'generator',
+                'params',
+                'status',
+                'phase',
+                *(f'counter_{name}' for name in counter_names),
             ]
         )
         for r in rows:
@@ -230,14 +1260,29 @@ def _write_csv(rows: list[EvalRow], generator: str, run_id: str) -> None:
                     r.seed if r.seed is not None else '',
                     r.type,
                     r.algorithm,
-                    r.path_length,
+                    r.path_length if r.path_length is not None else '',
                     r.visited if r.visited is not None else '',
                     r.total_iterations if r.total_iterations is not None else '',
                     r.inner_iterations if r.inner_iterations is not None else '',
                     r.outer_iterations if r.outer_iterations is not None else '',
                     r.max_fringe_size if r.max_fringe_size is not None else '',
                     f'{r.runtime_s:.6f}',
-                    r.memory_bytes,
+                    f'{r.runtime_iqr_s:.6f}' if r.runtime_iqr_s is not None else '',
+                    r.repeats if r.repeats is not None else '',
+                    r.memory_bytes if r.memory_bytes is not None else '',
+                    r.iterations_saved if r.iterations_saved is not None else '',
+                    f'{r.runtime_saved_s:.6f}' if r.runtime_saved_s is not None else '',
+                    f'{r.steps_per_s:.1f}' if r.steps_per_s is not None else '',
+                    f'{r.expected_steps:.4f}' if r.expected_steps is not None else '',
+                    f'{r.expected_steps_std:.4f}'
+                    if r.expected_steps_std is not None
+                    else '',
+                    f'{r.error_bound:.6g}' if r.error_bound is not None else '',
+                    r.generator or '',
+                    r.params or '',
+                    r.status,
+                    r.phase or '',
+                    *((r.counters or {}).get(name, '') for name in counter_names),
                 ]
             )
 
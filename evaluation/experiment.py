@@ -0,0 +1,68 @@
+import itertools
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+EXPERIMENT_KEYS = ('generators', 'sizes', 'seeds', 'solvers', 'settings', 'grid')
+SOLVER_SETS = ('pathfinding', 'mdp', 'rl')
+
+
+@dataclass(frozen=True)
+class Experiment:
+    name: str
+    generators: list[str] | None
+    sizes: list[int] | None
+    seeds: list[int] | None
+    solvers: list[str] | None
+    settings: dict
+    grid: list[dict]
+
+
+def load_experiment(path: str) -> Experiment:
+    spec = _read_spec(path)
+
+    unknown = sorted(set(spec) - set(EXPERIMENT_KEYS))
+    if unknown:
+        raise ValueError(f'Unknown experiment keys {unknown} in {path}')
+
+    solvers = spec.get('solvers')
+    if solvers is not None and not set(solvers) <= set(SOLVER_SETS):
+        raise ValueError(
+            f'Unknown solver sets {sorted(set(solvers) - set(SOLVER_SETS))};'
+            f' expected some of {list(SOLVER_SETS)}'
+        )
+
+    grid = spec.get('grid', {})
+    names = list(grid)
+    points = [
+        dict(zip(names, values))
+        for values in itertools.product(*(_as_list(grid[name]) for name in names))
+    ]
+
+    return Experiment(
+        name=Path(path).stem,
+        generators=spec.get('generators'),
+        sizes=spec.get('sizes'),
+        seeds=spec.get('seeds'),
+        solvers=solvers,
+        settings=spec.get('settings', {}),
+        grid=points,
+    )
+
+
+def _read_spec(path: str) -> dict:
+    if path.endswith('.json'):
+        with open(path) as f:
+            return json.load(f)
+
+    try:
+        import tomllib
+    except ImportError as e:
+        raise RuntimeError('TOML experiments require Python 3.11+; use JSON') from e
+
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
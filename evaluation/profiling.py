@@ -0,0 +1,123 @@
+import cProfile
+import glob
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable
+from time import perf_counter
+
+from algorithms.instrumentation import region_hook
+
+SAMPLE_INTERVAL = 0.001
+MIN_SAMPLES = 200
+SAMPLE_BUDGET_S = 1.0
+SUMMARY_FILE = 'summary.txt'
+
+
+class StackSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.counts: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._active = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target = 0
+        self._base_depth = 0
+        self._switch_interval = 0.0
+
+    def __enter__(self) -> 'StackSampler':
+        frame = sys._getframe(1)
+        self._target = threading.get_ident()
+        self._base_depth = len(_stack(frame))
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.interval, self._switch_interval))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def set_active(self, active: bool) -> None:
+        if active:
+            self._active.set()
+        else:
+            self._active.clear()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.counts.values())
+
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {n}\n' for stack, n in sorted(self.counts.items()))
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if not self._active.is_set():
+                continue
+
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+
+            stack = _stack(frame)[self._base_depth :]
+            if stack:
+                self.counts[';'.join(stack)] += 1
+
+
+def profile_call(call: Callable[[], object], path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    profiler = cProfile.Profile()
+    with region_hook(lambda active: _toggle(profiler, active)):
+        call()
+    profiler.dump_stats(f'{path}.pstats')
+
+    deadline = perf_counter() + SAMPLE_BUDGET_S
+    with StackSampler() as sampler, region_hook(sampler.set_active):
+        call()
+        while sampler.samples < MIN_SAMPLES and perf_counter() < deadline:
+            call()
+    with open(f'{path}.collapsed', 'w') as f:
+        f.write(sampler.collapsed())
+
+
+def write_summary(profile_dir: str, top=25) -> str | None:
+    pattern = os.path.join(profile_dir, '**', '*.pstats')
+    files = sorted(glob.glob(pattern, recursive=True))
+    if not files:
+        return None
+
+    out = io.StringIO()
+    out.write(f'Hot functions across {len(files)} profiled solver calls\n')
+    stats = pstats.Stats(*files, stream=out)
+    stats.strip_dirs().sort_stats('tottime').print_stats(top)
+
+    summary = out.getvalue()
+    with open(os.path.join(profile_dir, SUMMARY_FILE), 'w') as f:
+        f.write(summary)
+
+    return summary
+
+
+def _toggle(profiler: cProfile.Profile, active: bool) -> None:
+    if active:
+        profiler.enable()
+    else:
+        profiler.disable()
+
+
+def _stack(frame) -> list[str]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, 'co_qualname', code.co_name)
+        stack.append(f'{name} ({os.path.basename(code.co_filename)})')
+        frame = frame.f_back
+
+    return stack[::-1]
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import sqlite3
+import time
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SOURCE_PACKAGES = ('algorithms', 'evaluation', 'models', 'util')
+
+
+class ResultStore:
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' key TEXT PRIMARY KEY,'
+                ' job TEXT NOT NULL,'
+                ' rows TEXT NOT NULL,'
+                ' finished REAL NOT NULL)'
+            )
+
+    def completed(self, keys: list[str]) -> dict[str, list[dict]]:
+        found = {}
+        for lo in range(0, len(keys), 500):
+            chunk = keys[lo : lo + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for key, rows in self._conn.execute(
+                f'SELECT key, rows FROM jobs WHERE key IN ({placeholders})', chunk
+            ):
+                found[key] = json.loads(rows)
+
+        return found
+
+    def add(self, key: str, job: dict, rows: list[dict]) -> None:
+        with self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)',
+                (key, json.dumps(job), json.dumps(rows), time.time()),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def content_key(payload: dict) -> str:
+    encoded = json.dumps(
+        {**payload, 'code_version': code_version()}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    digest = hashlib.sha256()
+    for package in SOURCE_PACKAGES:
+        for source in sorted((ROOT / package).rglob('*.py')):
+            digest.update(str(source.relative_to(ROOT)).encode())
+            digest.update(source.read_bytes())
+
+    return digest.hexdigest()[:16]
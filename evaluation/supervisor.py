@@ -0,0 +1,111 @@
+import multiprocessing as mp
+import os
+import signal
+import traceback
+from collections.abc import Callable
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any
+
+POLL_INTERVAL = 0.05
+
+_phase_sender = None
+
+
+@dataclass(frozen=True)
+class JobLimits:
+    timeout_s: float | None = None
+    memory_bytes: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.timeout_s is not None or self.memory_bytes is not None
+
+
+@dataclass(frozen=True)
+class Outcome:
+    status: str
+    value: Any
+    run_time: float
+    peak_rss_bytes: int | None
+    phase: str | None = None
+
+
+def run_supervised(target: Callable, args: tuple, limits: JobLimits) -> Outcome:
+    context = mp.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(target, args, sender))
+    start_time = perf_counter()
+    process.start()
+    sender.close()
+
+    status, value = None, None
+    phase, phase_start = None, start_time
+    peak_rss = None
+    try:
+        while status is None:
+            if receiver.poll(POLL_INTERVAL):
+                message, payload = receiver.recv()
+                if message == 'phase':
+                    phase, phase_start = payload, perf_counter()
+                else:
+                    status, value = message, payload
+                continue
+
+            rss = _rss_bytes(process.pid)
+            if rss is not None:
+                peak_rss = max(peak_rss or 0, rss)
+
+            if not process.is_alive():
+                if receiver.poll():
+                    continue
+
+                process.join()
+                if process.exitcode != -signal.SIGKILL:
+                    raise RuntimeError(
+                        f'Supervised job exited with code {process.exitcode}'
+                        ' without a result'
+                    )
+                status = 'oom'
+            elif limits.timeout_s is not None and (
+                perf_counter() - phase_start > limits.timeout_s
+            ):
+                status = 'timeout'
+            elif limits.memory_bytes is not None and (rss or 0) > limits.memory_bytes:
+                status = 'oom'
+
+        if status == 'error':
+            raise RuntimeError(f'Supervised job failed:\n{value}')
+
+        return Outcome(status, value, perf_counter() - start_time, peak_rss, phase)
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+
+
+def enter_phase(name: str) -> None:
+    if _phase_sender is not None:
+        _phase_sender.send(('phase', name))
+
+
+def _child(target: Callable, args: tuple, sender) -> None:
+    global _phase_sender
+    _phase_sender = sender
+    try:
+        sender.send(('ok', target(*args)))
+    except MemoryError:
+        sender.send(('oom', None))
+    except Exception:  # noqa: BLE001 - forwarded to the supervising process
+        sender.send(('error', traceback.format_exc()))
+    finally:
+        sender.close()
+
+
+def _rss_bytes(pid: int) -> int | None:
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
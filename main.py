@@ -1,7 +1,8 @@
 import argparse
 import os
 
-from evaluation.evaluation import run_eval
+from algorithms.instrumentation import INSTRUMENTATION_MODES
+from evaluation.evaluation import RESULTS_DIR, run_eval
 from mdp.mdp import run_mdp
 from pathfinding.pathfinding import run_pathfinding
 
@@ -24,6 +25,17 @@ def read_args() -> argparse.Namespace:
         choices=['bfs', 'dfs', 'astar_manhattan', 'astar_euclid', 'astar_chebyshev'],
         default='dfs',
     )
+    pathfinding.add_argument(
+        '--export',
+        type=str,
+        help='Render headless to a PNG frame directory, or a GIF if it ends in .gif',
+    )
+    pathfinding.add_argument(
+        '--export-workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Worker processes rendering export frame ranges',
+    )
     pathfinding.add_argument(
         '--generator',
         type=str,
@@ -40,12 +52,36 @@ def read_args() -> argparse.Namespace:
     mdp.add_argument('--noise', type=float, default=0.2)
     mdp.add_argument('--discount', type=float, default=0.9)
     mdp.add_argument('--reward', type=float, default=-0.01)
+    mdp.add_argument(
+        '--warm-start', type=str, choices=['cold', 'bfs', 'cache'], default='cold'
+    )
+    mdp.add_argument(
+        '--cache-dir',
+        type=str,
+        default=os.path.join(RESULTS_DIR, 'solution_cache'),
+        help='Solutions kept here seed --warm-start cache solves with nearby'
+        ' (discount, noise, reward) on the same maze',
+    )
+    mdp.add_argument(
+        '--dtype', type=str, choices=['float64', 'float32'], default='float64'
+    )
     mdp.add_argument(
         '--solver',
         type=str,
         default='value-iteration',
         choices=['policy-iteration', 'value-iteration'],
     )
+    mdp.add_argument(
+        '--export',
+        type=str,
+        help='Render headless to a PNG frame directory, or a GIF if it ends in .gif',
+    )
+    mdp.add_argument(
+        '--export-workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Worker processes rendering export frame ranges',
+    )
     mdp.add_argument(
         '--generator',
         type=str,
@@ -72,13 +108,161 @@ def read_args() -> argparse.Namespace:
     eval_parser.add_argument('--noise', type=float, default=0.0)
     eval_parser.add_argument('--discount', type=float, default=0.9)
     eval_parser.add_argument('--reward', type=float, default=-0.01)
+    eval_parser.add_argument(
+        '--warm-start',
+        type=str,
+        choices=['cold', 'bfs', 'cache'],
+        default='cold',
+        help='Also run warm-started MDP solves and report iterations saved',
+    )
+    eval_parser.add_argument(
+        '--cache-dir',
+        type=str,
+        help='Solution cache shared by every job and grid point for --warm-start'
+        ' cache; warm solves only reuse other parameters (default: per-run)',
+    )
+    eval_parser.add_argument(
+        '--vi-workers',
+        type=int,
+        default=0,
+        help='Also run parallel value iteration with this many worker processes',
+    )
+    eval_parser.add_argument(
+        '--vi-mode', type=str, choices=['jacobi', 'async'], default='jacobi'
+    )
+    eval_parser.add_argument(
+        '--vi-stopping',
+        type=str,
+        choices=['residual', 'span', 'policy'],
+        default='residual',
+        help='Also run value iteration with this stopping rule against the default',
+    )
+    eval_parser.add_argument(
+        '--vi-epsilon',
+        type=float,
+        default=0.01,
+        help='Accepted suboptimality for the span stopping rule',
+    )
+    eval_parser.add_argument(
+        '--vi-stable-sweeps',
+        type=int,
+        default=5,
+        help='Sweeps without a policy change before the policy stopping rule stops',
+    )
+    eval_parser.add_argument(
+        '--reward-layouts',
+        type=int,
+        default=0,
+        help='Also solve this many random exit and penalty layouts on one maze',
+    )
+    eval_parser.add_argument(
+        '--sweep-discount',
+        type=str,
+        help='Comma-separated discounts solved together by batched value iteration',
+    )
+    eval_parser.add_argument(
+        '--sweep-noise',
+        type=str,
+        help='Comma-separated noises solved together by batched value iteration',
+    )
+    eval_parser.add_argument(
+        '--sweep-reward',
+        type=str,
+        help='Comma-separated living rewards solved together by batched value iteration',
+    )
+    eval_parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Run eval jobs, one per maze and job kind (pathfinding, mdp, rl, ...),'
+        ' in this many pinned worker processes',
+    )
+    eval_parser.add_argument(
+        '--timeout',
+        type=float,
+        help='Wall-clock seconds per measured solver run (each warmup, repeat,'
+        ' memory, profile and counter run); solvers run in supervised subprocesses'
+        ' and overruns are recorded as timeout rows naming the run',
+    )
+    eval_parser.add_argument(
+        '--memory-limit',
+        type=int,
+        help='Resident memory cap in MiB for the supervised solver process, checked'
+        ' throughout each measured run; overruns are recorded as oom rows',
+    )
+    eval_parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile each solver call in extra untimed runs; writes pstats and'
+        ' collapsed stacks per (algorithm, size, seed) plus a hot-function summary',
+    )
+    eval_parser.add_argument(
+        '--profile-dir',
+        type=str,
+        help='Directory for --profile output (default evaluation/results/profiles/'
+        '<run id>)',
+    )
+    eval_parser.add_argument(
+        '--instrumentation',
+        type=str,
+        choices=INSTRUMENTATION_MODES,
+        default='both',
+        help='Measure runtime, peak memory, or both in separate runs',
+    )
+    eval_parser.add_argument(
+        '--repeats',
+        type=int,
+        default=1,
+        help='Untraced timing runs per algorithm; runtime is their median',
+    )
+    eval_parser.add_argument(
+        '--warmup',
+        type=int,
+        default=0,
+        help='Discarded timing runs before the measured repeats',
+    )
+    eval_parser.add_argument(
+        '--counters',
+        action='store_true',
+        help='Record solver counters (expansions, heap ops, Bellman backups) and'
+        ' per-phase timings in an extra untimed run per algorithm',
+    )
+    eval_parser.add_argument(
+        '--config',
+        type=str,
+        help='TOML/JSON experiment listing generators, sizes, seeds, solvers and a'
+        ' parameter grid; its values override the matching flags',
+    )
     eval_parser.add_argument(
         '--csv', action='store_true', help='Write results to CSV file'
     )
+    eval_parser.add_argument(
+        '--store',
+        type=str,
+        nargs='?',
+        const=os.path.join(RESULTS_DIR, 'store.sqlite'),
+        help='SQLite file that keeps finished jobs; reruns skip jobs already stored',
+    )
     eval_parser.add_argument(
         '--pathfinding', action='store_true', help='Run pathfinding algorithms'
     )
     eval_parser.add_argument('--mdp', action='store_true', help='Run MDP algorithms')
+    eval_parser.add_argument(
+        '--rl', action='store_true', help='Run Q-learning and SARSA agents'
+    )
+    eval_parser.add_argument(
+        '--rl-steps',
+        type=int,
+        default=200_000,
+        help='Environment steps per reinforcement learning agent',
+    )
+    eval_parser.add_argument(
+        '--dtype',
+        type=str,
+        choices=['float64', 'float32'],
+        default='float64',
+        help='Floating point precision of MDP value arrays',
+    )
 
     return parser.parse_args()
 
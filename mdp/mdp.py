@@ -1,14 +1,35 @@
+import copy
 import os
+from collections.abc import Iterator
+from dataclasses import dataclass, replace
+from time import perf_counter
+
+import numpy as np
 
 from algorithms.mdp_algorithms import PolicyIteration, ValueIteration
+from algorithms.warm_start import SolutionCache
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 import pygame
 
+from models.cell import Open
 from models.maze import MdpMaze
+from util.background import BackgroundIterator, queue_depth
 from util.colors import DARK_GREY
+from util.export import CHUNK_FRAMES, export_animation, offscreen, save_frame
 from util.maze_generation import generate_maze
 from util.panel import PANEL_WIDTH, draw_info_panel
+from util.viewport import Viewport
+
+
+@dataclass(frozen=True)
+class Frame:
+    entries: list[tuple[str, str]]
+    draw_actions: bool
+    shortest_path: list[Open] | None
+    solve_time: float
+    values: np.ndarray | None = None
+    policy: np.ndarray | None = None
 
 
 def run_mdp(**kwargs):
@@ -25,184 +46,343 @@ def run_mdp(**kwargs):
     discount = kwargs['discount']
     noise = kwargs['noise']
     cell_size = kwargs['cell_size']
+    warm_start = kwargs['warm_start']
+    dtype = kwargs['dtype']
+    export = kwargs.get('export')
+    cache = SolutionCache(path=kwargs['cache_dir']) if warm_start == 'cache' else None
 
     raw_maze, start, end = generate_maze(height, width, generator, seed)
-    maze = MdpMaze(raw_maze, start, end, cell_size)
+    maze = MdpMaze(raw_maze, start, end, cell_size, dtype)
     maze.init_states(initial_value=0, goal_reward=20)
 
     if solver == 'value-iteration':
-        run_value_iteration(maze, discount, reward, noise, speed, generator)
-
-    if solver == 'policy-iteration':
-        run_policy_iteration(
-            maze, discount, noise, reward, speed, height, width, generator
+        title, font_sizes = 'Value Iteration', (18, 14)
+        frames = value_iteration_frames(
+            maze, discount, reward, noise, generator, warm_start, cache
         )
+    elif solver == 'policy-iteration':
+        title, font_sizes = 'Policy Iteration', (20, 16)
+        frames = policy_iteration_frames(
+            maze, discount, reward, noise, generator, warm_start, cache
+        )
+    else:
+        return
 
-
-def run_value_iteration(maze: MdpMaze, discount, reward, noise, speed, generator):
-    pygame.init()
-    title_font = pygame.font.SysFont('arial', 18, bold=True)
-    body_font = pygame.font.SysFont('arial', 14)
-    clock = pygame.time.Clock()
-    running = True
-
-    cell_size = maze.start.size
-
-    cols, rows = maze.dims()
-    maze_pixel_width = rows * cell_size
-    maze_pixel_height = cols * cell_size
-
-    screen = pygame.display.set_mode(
-        (maze_pixel_width + PANEL_WIDTH, maze_pixel_height), pygame.RESIZABLE
+    if export:
+        export_mdp(
+            maze, title, font_sizes, frames, export, kwargs['export_workers'], speed
+        )
+    else:
+        run_window(maze, title, font_sizes, frames, speed)
+
+
+def value_iteration_frames(
+    maze: MdpMaze,
+    discount,
+    reward,
+    noise,
+    generator,
+    warm_start='cold',
+    cache: SolutionCache | None = None,
+) -> Iterator[Frame]:
+    value_iteration = ValueIteration(
+        discount, reward, noise, warm_start=warm_start, cache=cache
     )
-
-    value_iteration = ValueIteration(discount, reward, noise)
-    result = value_iteration.solve(maze)
+    value_iteration.apply_warm_start(maze)
+    steps = value_iteration.iterate(maze)
+    snapshot = None
+    solve_time = 0.0
     iteration = 0
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.VIDEORESIZE:
-                screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
-
-        screen.fill(DARK_GREY)
-
-        snapshot = result.snapshots[iteration]
-        is_last = iteration >= len(result.snapshots) - 1
-        snapshot.maze.draw(screen, draw_values=True, draw_actions=is_last)
-        if is_last:
-            snapshot.maze.draw_policy(screen, maze.start, maze.end)
-        else:
-            iteration += 1
-
+    while True:
+        step_start = perf_counter()
+        next_snapshot = next(steps, None)
+        solve_time += perf_counter() - step_start
+        if next_snapshot is None:
+            break
+
+        snapshot = next_snapshot
+        iteration += 1
         entries = [
-            ('Generator', generator),
-            ('Size', f'{rows - 1}x{cols - 1}'),
-            ('Discount', str(discount)),
-            ('Noise', str(noise)),
-            ('Reward', str(reward)),
-            ('---', ''),
             ('Iteration', str(iteration)),
             ('Delta V', f'{snapshot.delta_v:.8f}'),
         ]
-
-        if is_last:
-            entries.extend(
-                [
-                    ('---', ''),
-                    ('Path Length', str(len(result.shortest_path))),
-                    ('Runtime', f'{result.run_time:.4f}s'),
-                    ('Memory', f'{result.peak_memory} B'),
-                ]
-            )
-
-        draw_info_panel(
-            screen,
-            maze_pixel_width,
-            screen.get_height(),
-            'Value Iteration',
-            entries,
-            title_font,
-            body_font,
+        yield Frame(
+            _entries(maze, generator, discount, noise, reward, entries),
+            False,
+            None,
+            solve_time,
         )
 
-        pygame.display.flip()
-        clock.tick(speed)
+    value_iteration.store_solution(maze, iteration, solve_time)
+    shortest_path = maze.shortest_path(maze.start, maze.end)
+    yield Frame(
+        _entries(
+            maze, generator, discount, noise, reward, entries, shortest_path, solve_time
+        ),
+        True,
+        shortest_path,
+        solve_time,
+    )
 
-    print('\n------------Evaluation-------------\n')
 
-    print(
-        f"""Shortest Path Length: {len(result.shortest_path)}
-Run Time: {result.run_time:.6f}s,
-Peak Memory: {result.peak_memory} bytes
-"""
+def policy_iteration_frames(
+    maze: MdpMaze,
+    discount,
+    reward,
+    noise,
+    generator,
+    warm_start='cold',
+    cache: SolutionCache | None = None,
+) -> Iterator[Frame]:
+    policy_iteration = PolicyIteration(
+        discount, reward, noise, theta=0.0001, warm_start=warm_start, cache=cache
+    )
+    policy_iteration.apply_warm_start(maze)
+    steps = policy_iteration.iterate(maze)
+    snapshot = None
+    solve_time = 0.0
+    while True:
+        step_start = perf_counter()
+        next_snapshot = next(steps, None)
+        solve_time += perf_counter() - step_start
+        if next_snapshot is None:
+            break
+
+        snapshot = next_snapshot
+        entries = [
+            ('Mode', snapshot.mode),
+            ('Eval Iters', str(snapshot.eval_iters)),
+            ('Improve Iters', str(snapshot.improve_iters)),
+            ('Total Iters', str(snapshot.eval_iters + snapshot.improve_iters)),
+            ('Delta V', f'{snapshot.delta_v:.4f}'),
+        ]
+        yield Frame(
+            _entries(maze, generator, discount, noise, reward, entries),
+            snapshot.mode == 'improve',
+            None,
+            solve_time,
+        )
+
+    policy_iteration.store_solution(
+        maze, snapshot.eval_iters + snapshot.improve_iters, solve_time
+    )
+    shortest_path = maze.shortest_path(maze.start, maze.end)
+    yield Frame(
+        _entries(
+            maze, generator, discount, noise, reward, entries, shortest_path, solve_time
+        ),
+        snapshot.mode == 'improve',
+        shortest_path,
+        solve_time,
     )
-    pygame.quit()
 
 
-def run_policy_iteration(
-    maze: MdpMaze, discount, noise, reward, speed, height, width, generator
+def run_window(
+    maze: MdpMaze,
+    title: str,
+    font_sizes: tuple[int, int],
+    frames: Iterator[Frame],
+    speed: int,
 ):
     pygame.init()
+    title_font, body_font = _fonts(font_sizes)
     clock = pygame.time.Clock()
-    title_font = pygame.font.SysFont('arial', 20, bold=True)
-    body_font = pygame.font.SysFont('arial', 16)
     running = True
 
-    cols, rows = maze.dims()
+    rows, cols = maze.dims()
     cell_size = maze.start.size
-    maze_pixel_width = rows * cell_size
-    maze_pixel_height = cols * cell_size
+    screen, viewport = _open_window(cols * cell_size, rows * cell_size, cell_size)
 
-    screen = pygame.display.set_mode(
-        (maze_pixel_width + PANEL_WIDTH, maze_pixel_height), pygame.RESIZABLE
+    display = copy.deepcopy(maze)
+    worker = BackgroundIterator(
+        lambda: with_snapshots(maze, frames), queue_depth(_frame_bytes(maze))
     )
-
-    policy_iteration = PolicyIteration(discount, reward, noise, theta=0.0001)
-    result = policy_iteration.solve(maze)
-    iteration = 0
-
+    frame = Frame([], False, None, 0.0)
+    full_redraw = True
+    last_entries = None
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.VIDEORESIZE:
                 screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+                viewport.resize((event.w - PANEL_WIDTH, event.h))
+                full_redraw = True
+            if viewport.handle_event(event):
+                full_redraw = True
+
+        next_frame = worker.poll()
+        maze_changed = next_frame is not None
+        if next_frame is not None:
+            frame = next_frame
+            display.values[:] = frame.values
+            display.policy[:] = frame.policy
+
+        dirty = []
+        if full_redraw:
+            screen.fill(DARK_GREY)
+            dirty.append(screen.get_rect())
+        if full_redraw or maze_changed:
+            dirty.append(_draw_maze(screen, viewport, display, frame))
+
+        entries = [*frame.entries, ('Solver Thread', worker.progress())]
+        if full_redraw or entries != last_entries:
+            dirty += draw_info_panel(
+                screen,
+                viewport.view_size[0],
+                screen.get_height(),
+                title,
+                entries,
+                title_font,
+                body_font,
+                None if full_redraw else last_entries,
+            )
+            last_entries = entries
 
-        screen.fill(DARK_GREY)
+        pygame.display.update([rect for rect in dirty if rect is not None])
+        full_redraw = False
+        clock.tick(speed)
 
-        snapshot = result.snapshots[iteration]
+    worker.stop()
+    _print_evaluation(frame.shortest_path, frame.solve_time)
+    pygame.quit()
 
-        snapshot.maze.draw(screen, True, snapshot.mode == 'improve')
-        is_last = iteration >= len(result.snapshots) - 1
-        if is_last:
-            snapshot.maze.draw_policy(screen, maze.start, maze.end)
-        else:
-            iteration += 1
 
-        entries = [
-            ('Generator', generator),
-            ('Size', f'{rows - 1}x{cols - 1}'),
-            ('Discount', str(discount)),
-            ('Noise', str(noise)),
-            ('Reward', str(reward)),
-            ('---', ''),
-            ('Mode', snapshot.mode),
-            ('Eval Iters', str(snapshot.eval_iters)),
-            ('Improve Iters', str(snapshot.improve_iters)),
-            ('Total Iters', str(snapshot.eval_iters + snapshot.improve_iters)),
-            ('Delta V', f'{snapshot.delta_v:.4f}'),
-        ]
+def export_mdp(
+    maze: MdpMaze,
+    title: str,
+    font_sizes: tuple[int, int],
+    frames: Iterator[Frame],
+    path: str,
+    workers: int,
+    fps: int,
+) -> None:
+    last = []
+
+    def recorded() -> Iterator[Frame]:
+        for frame in with_snapshots(maze, frames):
+            last[:] = [frame]
+            yield frame
+
+    export_start = perf_counter()
+    count = export_animation(
+        path,
+        _render_frames,
+        (copy.deepcopy(maze), title, font_sizes),
+        recorded(),
+        workers,
+        fps,
+        queue_depth(_frame_bytes(maze) * (2 * workers + 1), CHUNK_FRAMES),
+    )
+    print(f'Exported {count} frames to {path} in {perf_counter() - export_start:.2f}s')
+    _print_evaluation(last[0].shortest_path, last[0].solve_time)
 
-        if is_last:
-            entries.extend(
-                [
-                    ('---', ''),
-                    ('Path Length', str(len(result.shortest_path))),
-                    ('Runtime', f'{result.run_time:.4f}s'),
-                    ('Memory', f'{result.peak_memory} B'),
-                ]
-            )
 
+def with_snapshots(maze: MdpMaze, frames: Iterator[Frame]) -> Iterator[Frame]:
+    for frame in frames:
+        yield replace(frame, values=maze.values.copy(), policy=maze.policy.copy())
+
+
+def _frame_bytes(maze: MdpMaze) -> int:
+    return maze.values.nbytes + maze.policy.nbytes
+
+
+def _render_frames(scene, frames: list[Frame], first: int, frame_dir: str) -> None:
+    maze, title, font_sizes = scene
+    pygame.font.init()
+    title_font, body_font = _fonts(font_sizes)
+
+    rows, cols = maze.dims()
+    cell_size = maze.start.size
+    screen, viewport = offscreen((cols * cell_size, rows * cell_size), cell_size)
+    for i, frame in enumerate(frames):
+        maze.values[:] = frame.values
+        maze.policy[:] = frame.policy
+        screen.fill(DARK_GREY)
+        _draw_maze(screen, viewport, maze, frame)
         draw_info_panel(
             screen,
-            maze_pixel_width,
+            viewport.view_size[0],
             screen.get_height(),
-            'Policy Iteration',
-            entries,
+            title,
+            frame.entries,
             title_font,
             body_font,
         )
+        save_frame(screen, frame_dir, first + i)
 
-        pygame.display.flip()
-        clock.tick(speed)
+
+def _draw_maze(
+    screen: pygame.Surface, viewport: Viewport, maze: MdpMaze, frame: Frame
+) -> pygame.Rect | None:
+    rect = maze.draw(
+        screen, viewport, draw_values=True, draw_actions=frame.draw_actions
+    )
+    if frame.shortest_path is not None:
+        maze.draw_policy(screen, maze.start, maze.end, viewport)
+
+    return rect
+
+
+def _entries(
+    maze: MdpMaze,
+    generator,
+    discount,
+    noise,
+    reward,
+    solver_entries: list[tuple[str, str]],
+    shortest_path: list[Open] | None = None,
+    solve_time=0.0,
+) -> list[tuple[str, str]]:
+    rows, cols = maze.dims()
+    entries = [
+        ('Generator', generator),
+        ('Size', f'{cols - 1}x{rows - 1}'),
+        ('Discount', str(discount)),
+        ('Noise', str(noise)),
+        ('Reward', str(reward)),
+        ('---', ''),
+        *solver_entries,
+    ]
+
+    if shortest_path is not None:
+        entries.extend(
+            [
+                ('---', ''),
+                ('Path Length', str(len(shortest_path))),
+                ('Runtime', f'{solve_time:.4f}s'),
+            ]
+        )
+
+    return entries
+
+
+def _fonts(font_sizes: tuple[int, int]):
+    return (
+        pygame.font.SysFont('arial', font_sizes[0], bold=True),
+        pygame.font.SysFont('arial', font_sizes[1]),
+    )
+
+
+def _open_window(
+    world_width: int, world_height: int, cell_size: int
+) -> tuple[pygame.Surface, Viewport]:
+    world_size = (world_width, world_height)
+    view_width, view_height = Viewport.initial_view_size(world_size)
+    screen = pygame.display.set_mode(
+        (view_width + PANEL_WIDTH, view_height), pygame.RESIZABLE
+    )
+    return screen, Viewport(world_size, (view_width, view_height), cell_size)
+
+
+def _print_evaluation(shortest_path, solve_time: float) -> None:
+    if shortest_path is None:
+        print('\nSolve interrupted before convergence')
+        return
 
     print('\n------------Evaluation-------------\n')
     print(
-        f"""Shortest Path Length: {len(result.shortest_path)}
-Run Time: {result.run_time:.6f}s,
-Peak Memory: {result.peak_memory} bytes
+        f"""Shortest Path Length: {len(shortest_path)}
+Run Time: {solve_time:.6f}s
 """
     )
-    pygame.quit()
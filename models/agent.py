@@ -1,60 +1,132 @@
+from collections.abc import Iterator
+from time import perf_counter
 from typing import Protocol
 
 import pygame
 
-from algorithms.pathfinding_algorithms import (BFS, DFS, AStar,
-                                               PathFindingResult,
-                                               chebyshev_distance,
-                                               euclidean_distance,
-                                               manhattan_distance)
+from algorithms.pathfinding_algorithms import (
+    BFS,
+    DFS,
+    AStar,
+    PathFound,
+    SearchEvent,
+    chebyshev_distance,
+    euclidean_distance,
+    manhattan_distance,
+)
 from models.cell import Open
 from models.maze import Maze
+from util.background import BackgroundIterator
+from util.viewport import Layer, Viewport
 
 
 class Solver(Protocol):
-    def solve(self, maze: Maze, start: Open) -> PathFindingResult: ...
+    def iterate(self, maze: Maze, start: Open) -> Iterator[SearchEvent]: ...
 
 
 class Agent:
-    def __init__(self, maze: Maze, solver: str) -> None:
+    def __init__(self, maze: Maze, solver: str, background=False) -> None:
         self.maze: Maze = maze
         self.curr: Open = maze.start
-        self.curr_i: int = 0
         self.solver = self._create_solver(solver)
-        self.pathfinding_result: PathFindingResult = self.solver.solve(maze, self.curr)
-
-    def draw(self, screen: pygame.Surface, highlight_head: bool) -> None:
-        sub_path = self.pathfinding_result.visited[: self.curr_i + 1]
-        for i, cell in enumerate(sub_path):
-            cell_size = cell.size
-            px, py = (
-                (cell.y * cell_size) + cell_size / 2,
-                (cell.x * cell_size) + cell_size / 2,
-            )
-            if highlight_head:
-                color = (0, 240, 0) if i == len(sub_path) - 1 else (128, 0, 128)
-            else:
-                color = (128, 0, 128)
-            pygame.draw.circle(screen, color, (px, py), cell_size // 4)
-
-    def draw_shortest_path(self, screen: pygame.Surface, cell_size: int = 32) -> None:
-        shortest_path = self.pathfinding_result.shortest_path
-        for cell in shortest_path:
-            px, py = (
-                (cell.y * cell_size) + cell_size / 2,
-                (cell.x * cell_size) + cell_size / 2,
-            )
-            pygame.draw.circle(screen, (0, 230, 0), (px, py), cell_size // 3.5)
+        self.events: Iterator[SearchEvent] = self.solver.iterate(maze, self.curr)
+        self.worker: BackgroundIterator[SearchEvent] | None = (
+            BackgroundIterator(lambda: self.events) if background else None
+        )
+        self.visited: list[Open] = []
+        self.shortest_path: list[Open] = []
+        self.max_fringe_size: int = 1
+        self.solve_time: float = 0.0
+        self.finished: bool = False
+        self._trail: Layer | None = None
+        self._changed: list[Open] = []
+        self._head: Open | None = None
+
+    def draw(
+        self, screen: pygame.Surface, viewport: Viewport, highlight_head: bool
+    ) -> pygame.Rect | None:
+        rect = viewport.render(screen, self._layers())
+        self._changed = []
+        self._head = None
+        self._draw_head(screen, viewport, highlight_head)
+        return rect
+
+    def draw_changes(
+        self, screen: pygame.Surface, viewport: Viewport, highlight_head: bool
+    ) -> list[pygame.Rect]:
+        changed = self._changed + ([self._head] if self._head else [])
+        rects = []
+        for cell in changed:
+            rect = viewport.render(screen, self._layers(), cell.rect())
+            if rect is not None:
+                rects.append(rect)
+
+        self._changed = []
+        self._head = None
+        rects.extend(self._draw_head(screen, viewport, highlight_head))
+        return rects
 
     def step(self) -> bool:
-        len_visited = len(self.pathfinding_result.visited)
-        len_curr_i = self.curr_i + 1
+        if self.finished:
+            return True
+
+        if self.worker is None:
+            step_start = perf_counter()
+            event = next(self.events, None)
+            self.solve_time += perf_counter() - step_start
+        else:
+            event = self.worker.poll()
+            if event is None and not self.worker.exhausted:
+                return False
+            self.solve_time = self.worker.busy_time
+
+        if event is None:
+            self.finished = True
+        elif isinstance(event, PathFound):
+            self.shortest_path = event.shortest_path
+            self.finished = True
+            for cell in self.shortest_path:
+                self._mark(cell, (0, 230, 0))
+        else:
+            self.curr = event.cell
+            self.visited.append(event.cell)
+            self.max_fringe_size = max(self.max_fringe_size, event.fringe_size)
+            self._mark(event.cell, (128, 0, 128))
+
+        return self.finished
 
-        if len_visited > len_curr_i:
-            self.curr = self.pathfinding_result.visited[self.curr_i + 1]
-            self.curr_i += 1
+    def _mark(self, cell: Open, color) -> None:
+        trail = self._trail_layer()
+        trail.surface.set_at((cell.y, cell.x), color)
+        trail.version += 1
+        self._changed.append(cell)
 
-        return len_visited == len_curr_i
+    def _draw_head(
+        self, screen: pygame.Surface, viewport: Viewport, highlight_head: bool
+    ) -> list[pygame.Rect]:
+        if not highlight_head or not self.visited:
+            return []
+
+        head = self.visited[-1]
+        self._head = head
+        if not viewport.is_visible(head.rect()):
+            return []
+
+        radius = max(head.size // 4 * viewport.zoom, 1)
+        center = viewport.to_screen(_center(head))
+        pygame.draw.circle(screen, (0, 240, 0), center, radius)
+        return [viewport.screen_rect(head.rect())]
+
+    def _layers(self) -> list[Layer]:
+        return [self.maze.static_layer(), self._trail_layer()]
+
+    def _trail_layer(self) -> Layer:
+        if self._trail is None:
+            rows, cols = self.maze.dims()
+            surface = pygame.Surface((cols, rows), pygame.SRCALPHA, 32)
+            self._trail = Layer(surface, self.maze.start.size)
+
+        return self._trail
 
     def _create_solver(self, solver: str | None) -> Solver:
         if solver == 'bfs':
@@ -69,3 +141,10 @@ class Agent:
             return AStar(heuristic=chebyshev_distance)
         else:
             return DFS()
+
+
+def _center(cell: Open) -> tuple[float, float]:
+    return (
+        (cell.y * cell.size) + cell.size / 2,
+        (cell.x * cell.size) + cell.size / 2,
+    )
@@ -8,7 +8,7 @@ from models.direction import Action
 from util.colors import BLACK
 
 
-@dataclass(eq=True)
+@dataclass(eq=True, slots=True)
 class Cell:
     x: int
     y: int
@@ -17,6 +17,9 @@ class Cell:
     def coordinates(self):
         return (self.x, self.y)
 
+    def rect(self) -> pygame.Rect:
+        return pygame.Rect(self.y * self.size, self.x * self.size, self.size, self.size)
+
     def manhattan_dist(self, other) -> int:
         return abs(self.x - other.x) + abs(self.y - other.y)
 
@@ -24,49 +27,53 @@ class Cell:
         return f'({self.x}, {self.y})'
 
 
-@dataclass(eq=True)
+@dataclass(eq=True, slots=True)
 class Open(Cell):
     north: bool
     east: bool
     south: bool
     west: bool
-    value = 100.0
-    policy = Action.NORTH
 
-    def draw_action(self, screen: Surface, color=BLACK):
-        if not self.policy:
+    def draw_action(
+        self,
+        screen: Surface,
+        action: Action | None,
+        color=BLACK,
+        rect: pygame.Rect | None = None,
+    ):
+        if not action:
             return
 
-        cx = self.y * self.size + self.size // 2
-        cy = self.x * self.size + self.size // 2
-        shift = self.size // 4
+        rect = rect or self.rect()
+        cx, cy = rect.center
+        shift = rect.width // 4
 
-        if self.policy == Action.NORTH:
+        if action == Action.NORTH:
             points = [
                 (cx, cy - shift),
                 (cx - shift, cy + shift),
                 (cx + shift, cy + shift),
             ]
-        elif self.policy == Action.SOUTH:
+        elif action == Action.SOUTH:
             points = [
                 (cx, cy + shift),
                 (cx - shift, cy - shift),
                 (cx + shift, cy - shift),
             ]
-        elif self.policy == Action.EAST:
+        elif action == Action.EAST:
             points = [
                 (cx + shift, cy),
                 (cx - shift, cy - shift),
                 (cx - shift, cy + shift),
             ]
-        elif self.policy == Action.WEST:
+        elif action == Action.WEST:
             points = [
                 (cx - shift, cy),
                 (cx + shift, cy - shift),
                 (cx + shift, cy + shift),
             ]
         else:
-            print(f'Could not work with direction {self.policy}')
+            print(f'Could not work with direction {action}')
             return
 
         pygame.draw.polygon(screen, color, points)
@@ -84,13 +91,10 @@ class Open(Cell):
 
         return dirs
 
-    def __str__(self) -> str:
-        return f'({self.x}, {self.y}), V={self.value}'
-
     def __hash__(self):
         return hash((self.x, self.y, self.north, self.east, self.south, self.west))
 
 
-@dataclass(eq=True)
+@dataclass(eq=True, slots=True)
 class Wall(Cell):
     pass
@@ -6,3 +6,6 @@ class Action(Enum):
     SOUTH = 'south'
     WEST = 'west'
     EAST = 'east'
+
+
+ACTIONS = [Action.NORTH, Action.WEST, Action.SOUTH, Action.EAST]
@@ -1,58 +1,50 @@
 import random
-from typing import List, Tuple
+from collections import deque
+from math import ulp
 
+import numpy as np
 import pygame
 from pygame import Surface
 
 from models.cell import Cell, Open, Wall
-from models.direction import Action
-from util.colors import BLUE, DARK_GREY, GREEN, WHITE
+from models.direction import ACTIONS, Action
+from models.transition_model import Adjacency, TransitionModel
+from util.colors import BLUE, DARK_GREY, GREEN, RED, WHITE
+from util.viewport import Layer, Viewport
 
 
 class Maze:
     def __init__(
-        self, maze: List[List[int]], start: Tuple, end: Tuple, cell_size: int = 20
+        self, maze: list[list[int]], start: tuple, end: tuple, cell_size: int = 20
     ) -> None:
-        self.grid: List[List[Cell]] = self._build_maze(maze, start, end, cell_size)
+        self.grid: list[list[Cell]] = self._build_maze(maze, start, end, cell_size)
         self.start: Open = self.get_cell(*start)
         self.end: Open = self.get_cell(*end)
+        self._static: Layer | None = None
 
-    def draw(
-        self, screen: pygame.Surface, draw_values=False, draw_actions=False
-    ) -> None:
-        for cell in self.get_cells():
-            is_start = cell == self.start
-            is_end = cell == self.end
-
-            cell_size = cell.size
-            px, py = cell.y * cell_size, cell.x * cell_size
-            rect = pygame.Rect(px, py, cell_size, cell.size)
-
-            if isinstance(cell, Wall):
-                pygame.draw.rect(screen, DARK_GREY, rect)
-            elif isinstance(cell, Open):
-                if is_start:
-                    pygame.draw.rect(screen, BLUE, rect)
-                elif is_end:
-                    pygame.draw.rect(screen, GREEN, rect)
-                else:
-                    pygame.draw.rect(screen, WHITE, rect)
-                    if draw_values:
-                        values = [
-                            c.value
-                            for c in self.get_open_cells()
-                            if c.value is not None
-                        ]
-                        min_v = min(values) if values else 0
-                        max_v = max(values) if values else 1
-                        range_v = max_v - min_v if max_v != min_v else 1
-                        t = ((cell.value - min_v) / range_v) ** 0.3
-                        pygame.draw.rect(
-                            screen, (int(240 * (1 - t)), int(240 * t), 0), rect
-                        )
-
-                    if draw_actions and not cell == self.end and not cell == self.start:
-                        cell.draw_action(screen)
+    def draw(self, screen: pygame.Surface, viewport: Viewport) -> pygame.Rect | None:
+        return viewport.render(screen, [self.static_layer()])
+
+    def static_layer(self) -> Layer:
+        if self._static is None:
+            rows, cols = self.dims()
+            surface = Surface((cols, rows), 0, 32)
+            pygame.surfarray.blit_array(surface, self._static_colors())
+            self._static = Layer(surface, self.start.size)
+
+        return self._static
+
+    def invalidate_static_layer(self) -> None:
+        self._static = None
+
+    def _static_colors(self) -> np.ndarray:
+        is_open = np.array(
+            [[isinstance(cell, Open) for cell in row] for row in self.grid]
+        ).T
+        colors = np.where(is_open[:, :, None], WHITE, DARK_GREY).astype(np.uint8)
+        colors[self.start.y, self.start.x] = BLUE
+        colors[self.end.y, self.end.x] = GREEN
+        return colors
 
     def get_cell(self, x: int, y: int) -> Open:
         cell = self.grid[x][y]
@@ -71,7 +63,7 @@ class Maze:
         elif action == Action.EAST:
             return self.get_cell(curr.x, curr.y + 1)
 
-    def neighbors(self, cell: Open) -> List[Tuple[Action, Open]]:
+    def neighbors(self, cell: Open) -> list[tuple[Action, Open]]:
         neigbors = []
         if cell.north:
             neigbors.append((Action.NORTH, self.get_cell(cell.x - 1, cell.y)))
@@ -84,24 +76,24 @@ class Maze:
 
         return neigbors
 
-    def get_open_cells(self) -> List[Open]:
+    def get_open_cells(self) -> list[Open]:
         return [c for c in self.get_cells() if isinstance(c, Open)]
 
-    def get_cells(self) -> List[Cell]:
+    def get_cells(self) -> list[Cell]:
         return [cell for row in self.grid for cell in row]
 
-    def dims(self) -> Tuple[int, int]:
+    def dims(self) -> tuple[int, int]:
         return (len(self.grid), len(self.grid[0]))
 
     def _build_maze(
-        self, grid: List[List[int]], start, end, cell_size: int
-    ) -> List[List[Cell]]:
+        self, grid: list[list[int]], start, end, cell_size: int
+    ) -> list[list[Cell]]:
         rows, cols = len(grid), len(grid[0])
 
         def is_wall(x: int, y: int) -> bool:
             return grid[x][y] == 1 and (x, y) != start and (x, y) != end
 
-        maze: List[List[Cell]] = []
+        maze: list[list[Cell]] = []
         for x in range(rows):
             row = []
             for y in range(cols):
@@ -118,6 +110,11 @@ class Maze:
 
         return maze
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_static'] = None
+        return state
+
     def __str__(self) -> str:
         str = ''
         for r in self.grid:
@@ -128,53 +125,263 @@ class Maze:
         return str
 
 
+NO_ACTION = 255
+
+
 class MdpMaze(Maze):
     def __init__(
-        self, maze: List[List[int]], start: Tuple, end: Tuple, cell_size: int = 20
+        self,
+        maze: list[list[int]],
+        start: tuple,
+        end: tuple,
+        cell_size: int = 20,
+        dtype='float64',
     ) -> None:
         super().__init__(maze, start, end, cell_size)
+        self.state_ids, self.coordinates, self.successors = self.index_states()
+        self.adjacency = Adjacency.of(self.successors)
+        self.values = np.zeros(len(self.coordinates), dtype=dtype)
+        self.policy = np.full(len(self.coordinates), NO_ACTION, dtype=np.uint8)
+        self._transitions: TransitionModel | None = None
+        self._heatmap: Layer | None = None
+        self.set_reward_map(*self.goal_reward_map(0.0))
+
+    def compile_transitions(self, noise: float) -> TransitionModel:
+        if self._transitions is None or self._transitions.noise != noise:
+            self._transitions = TransitionModel(
+                self.successors, self.adjacency, noise, self.values.dtype
+            )
+
+        return self._transitions
+
+    def state_of(self, cell: Open) -> int:
+        return int(self.state_ids[cell.x, cell.y])
+
+    def cell_of(self, state: int) -> Open:
+        x, y = self.coordinates[state]
+        return self.get_cell(int(x), int(y))
+
+    def policy_of(self, cell: Open) -> Action | None:
+        a = self.policy[self.state_of(cell)]
+        return ACTIONS[a] if a != NO_ACTION else None
+
+    def goal_reward_map(self, goal_reward: float) -> tuple[np.ndarray, np.ndarray]:
+        rewards = np.zeros(self.dims())
+        terminals = np.zeros(self.dims(), dtype=bool)
+        rewards[self.end.coordinates()] = goal_reward
+        terminals[self.end.coordinates()] = True
+        return rewards, terminals
+
+    def set_reward_map(self, rewards: np.ndarray, terminals: np.ndarray) -> None:
+        xs, ys = self.coordinates[:, 0], self.coordinates[:, 1]
+        self.rewards = np.asarray(rewards, dtype=float)[xs, ys]
+        self.terminals = np.asarray(terminals, dtype=bool)[xs, ys]
+        self.updatable = ~self.terminals & (self.successors >= 0).any(axis=1)
+        self.nonterminal = np.flatnonzero(self.updatable).astype(np.int32)
+        self.values[self.terminals] = self.rewards[self.terminals]
+        self.goal_reward = float(self.rewards[self.terminals].max(initial=0.0))
+        self.invalidate_static_layer()
+        self._heatmap = None
+
+    def step_rewards(self, living_reward: float) -> np.ndarray:
+        return np.where(self.terminals, 0.0, living_reward + self.rewards)
 
     def init_states(self, initial_value: float, goal_reward: float) -> None:
-        for cell in super().get_open_cells():
-            cell.value = initial_value if cell != self.end else goal_reward
-            cell.policy = random.choice(cell.open_directions())
+        self.values[:] = initial_value
+        self.set_reward_map(*self.goal_reward_map(goal_reward))
+        for i, cell in enumerate(self.get_open_cells()):
+            self.policy[i] = _action_index(random.choice(cell.open_directions()))
+
+    def init_from_distances(self, discount: float, living_reward: float) -> None:
+        steps, nearest = self.goal_distances()
+        for i in self.nonterminal:
+            goal = self.rewards[nearest[i]] if nearest[i] >= 0 else 0.0
+            self.values[i] = self.distance_value(
+                steps[i], goal, discount, living_reward
+            )
+
+            successors = self.successors[i]
+            if np.isfinite(steps[i]):
+                next_steps = np.where(successors >= 0, steps[successors], np.inf)
+                self.policy[i] = int(np.argmin(next_steps))
+            else:
+                cell = self.cell_of(i)
+                self.policy[i] = _action_index(random.choice(cell.open_directions()))
+
+    def distance_value(
+        self, steps: float, goal_reward: float, discount: float, living_reward: float
+    ) -> float:
+        return (
+            _discounted_sum(living_reward, discount, steps)
+            + discount**steps * goal_reward
+        )
+
+    def init_from_solution(self, values: np.ndarray, policy: np.ndarray) -> None:
+        self.values[:] = values
+        self.policy[:] = policy
+
+    def index_states(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        cells = super().get_open_cells()
+        coordinates = np.array([c.coordinates() for c in cells], dtype=np.int32)
+        state_ids = np.full(self.dims(), -1, dtype=np.int32)
+        state_ids[coordinates[:, 0], coordinates[:, 1]] = np.arange(len(cells))
+        successors = np.full((len(cells), len(ACTIONS)), -1, dtype=np.int32)
+        for i, cell in enumerate(cells):
+            for action, neighbor in self.neighbors(cell):
+                successors[i, ACTIONS.index(action)] = state_ids[neighbor.x, neighbor.y]
+
+        return state_ids, coordinates, successors
+
+    def goal_distances(self) -> tuple[np.ndarray, np.ndarray]:
+        terminals = np.flatnonzero(self.terminals)
+        steps = np.full(len(self.coordinates), np.inf)
+        nearest = np.full(len(self.coordinates), -1, dtype=np.int64)
+        steps[terminals] = 0
+        nearest[terminals] = terminals
+
+        successors = self.successors.tolist()
+        queue = deque(terminals.tolist())
+        while queue:
+            curr = queue.popleft()
+            for j in successors[curr]:
+                if j >= 0 and nearest[j] < 0:
+                    steps[j] = steps[curr] + 1
+                    nearest[j] = nearest[curr]
+                    queue.append(j)
+
+        return steps, nearest
+
+    def draw(
+        self,
+        screen: pygame.Surface,
+        viewport: Viewport,
+        draw_values=False,
+        draw_actions=False,
+    ) -> pygame.Rect | None:
+        layers = [self.static_layer()]
+        if draw_values:
+            layers.append(self.heatmap())
+        rect = viewport.render(screen, layers)
+
+        if draw_actions and viewport.shows_detail():
+            for cell in self.visible_cells(viewport):
+                i = self.state_of(cell)
+                if self.updatable[i] and cell != self.start:
+                    cell.draw_action(
+                        screen,
+                        self.policy_of(cell),
+                        rect=viewport.screen_rect(cell.rect()),
+                    )
+
+        return rect
+
+    def visible_cells(self, viewport: Viewport) -> list[Open]:
+        rows, cols = viewport.visible_cells()
+        return [
+            cell
+            for x in rows
+            for cell in self.grid[x][cols.start : cols.stop]
+            if isinstance(cell, Open)
+        ]
+
+    def heatmap(self) -> Layer:
+        shaded = self.updatable.copy()
+        shaded[self.state_of(self.start)] = False
+        xs, ys = self.coordinates[shaded, 0], self.coordinates[shaded, 1]
+
+        if self._heatmap is None:
+            rows, cols = self.dims()
+            surface = Surface((cols, rows), pygame.SRCALPHA, 32)
+            alpha = pygame.surfarray.pixels_alpha(surface)
+            alpha[...] = 0
+            alpha[ys, xs] = 255
+            del alpha
+            self._heatmap = Layer(surface, self.start.size)
+
+        values = self.values.astype(float)
+        min_v = float(values.min()) if len(values) else 0.0
+        max_v = float(values.max()) if len(values) else 1.0
+        range_v = max_v - min_v if max_v != min_v else 1
+        t = np.clip((values[shaded] - min_v) / range_v, 0.0, 1.0) ** 0.3
+
+        pixels = pygame.surfarray.pixels3d(self._heatmap.surface)
+        pixels[ys, xs, 0] = (240 * (1 - t)).astype(np.uint8)
+        pixels[ys, xs, 1] = (240 * t).astype(np.uint8)
+        pixels[ys, xs, 2] = 0
+        del pixels
+        self._heatmap.version += 1
+
+        return self._heatmap
+
+    def _static_colors(self) -> np.ndarray:
+        colors = super()._static_colors()
+        for i in np.flatnonzero(self.terminals):
+            x, y = self.coordinates[i]
+            if (x, y) != self.end.coordinates():
+                colors[y, x] = GREEN if self.rewards[i] >= 0 else RED
+
+        return colors
+
+    def draw_policy(
+        self, screen: Surface, start: Open, end: Open, viewport: Viewport
+    ) -> list[pygame.Rect]:
+        rects = []
+        if not viewport.shows_detail():
+            return rects
 
-    def draw_policy(self, screen: Surface, start: Open, end: Open) -> None:
         for c in self.shortest_path(start, end):
-            c.draw_action(screen, GREEN)
+            if viewport.is_visible(c.rect()):
+                rect = viewport.screen_rect(c.rect())
+                c.draw_action(screen, self.policy_of(c), GREEN, rect)
+                rects.append(rect)
+
+        return rects
 
-    def shortest_path(self, start, end) -> List[Open]:
-        path: List[Open] = []
+    def shortest_path(self, start, end) -> list[Open]:
+        path: list[Open] = []
         seen = set()
         curr = start
         while curr and curr not in seen:
-            if curr == end:
+            if curr == end or self.terminals[self.state_of(curr)]:
                 break
 
             path.append(curr)
             seen.add(curr)
-            curr = self.move_to(curr, curr.policy)
+            curr = self.move_to(curr, self.policy_of(curr))
 
-        if curr == end:
+        if curr and (curr == end or self.terminals[self.state_of(curr)]):
             path.append(curr)
 
         return path
 
-    def value_by_action(self, cell, noise) -> dict[Action, float]:
-        value_by_action = {}
-        neighbors = self.neighbors(cell)
-        for dir, _ in neighbors:
-            expected_value = 0
-            for dir2, neigh2 in neighbors:
-                no_neighbors = len(neighbors)
-                if no_neighbors == 1:
-                    expected_value += neigh2.value
-                else:
-                    probability = (
-                        1 - noise if dir == dir2 else noise / (no_neighbors - 1)
-                    )
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_transitions'] = None
+        state['_heatmap'] = None
+        return state
+
+
+PRECISION_ULPS = 4
+
+
+def precision_changes(previous: np.ndarray, values: np.ndarray) -> np.ndarray:
+    changes = np.subtract(
+        values, previous, out=np.zeros_like(values), where=values != previous
+    )
+    slack = PRECISION_ULPS * np.spacing(np.abs(values))
+    return np.where(np.abs(changes) <= slack, 0, changes)
+
+
+def is_precision_change(diff: float, value: float, dtype: np.dtype) -> bool:
+    scale = 2.0 ** (np.finfo(np.float64).nmant - np.finfo(dtype).nmant)
+    return abs(diff) > PRECISION_ULPS * scale * ulp(value)
+
+
+def _action_index(action: Action) -> int:
+    return ACTIONS.index(action)
 
-                    expected_value += probability * neigh2.value
 
-            value_by_action[dir] = expected_value
-        return value_by_action
+def _discounted_sum(reward: float, discount: float, steps: float) -> float:
+    if discount >= 1:
+        return reward * steps if reward else 0.0
+    return reward * (1 - discount**steps) / (1 - discount)
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from models.direction import ACTIONS
+
+
+@dataclass(frozen=True)
+class Adjacency:
+    offsets: np.ndarray
+    counts: np.ndarray
+    next_states: np.ndarray
+    actions: np.ndarray
+
+    @classmethod
+    def of(cls, successors: np.ndarray) -> 'Adjacency':
+        valid = successors >= 0
+        counts = valid.sum(axis=1).astype(np.uint8)
+        offsets = np.zeros(len(successors) + 1, dtype=np.int32)
+        np.cumsum(counts, out=offsets[1:])
+        actions = np.nonzero(valid)[1].astype(np.uint8)
+        return cls(offsets, counts, successors[valid], actions)
+
+
+@dataclass(frozen=True)
+class TransitionRows:
+    offsets: memoryview
+    counts: memoryview
+    next_states: memoryview
+    actions: memoryview
+    keep: memoryview
+    spread: memoryview
+
+    def transitions(self, s: int, action: int) -> tuple[list[int], list[float]]:
+        lo, hi = self.offsets[s], self.offsets[s + 1]
+        keep, spread = self.keep[hi - lo], self.spread[hi - lo]
+        probabilities = [keep if a == action else spread for a in self.actions[lo:hi]]
+        return self.next_states[lo:hi].tolist(), probabilities
+
+
+class TransitionModel:
+    def __init__(
+        self,
+        successors: np.ndarray,
+        adjacency: Adjacency,
+        noise: float,
+        dtype='float64',
+    ) -> None:
+        self.successors = successors
+        self.adjacency = adjacency
+        self.noise = noise
+
+        counts = np.arange(len(ACTIONS) + 1)
+        is_noisy = counts > 1
+        self.keep = np.where(is_noisy, 1 - noise, 1.0).astype(dtype)
+        spread = noise / np.maximum(counts - 1, 1)
+        self.spread = np.where(is_noisy, spread, 0.0).astype(dtype)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.adjacency.counts
+
+    def probabilities(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.keep[self.counts], self.spread[self.counts]
+
+    def rows(self) -> TransitionRows:
+        return TransitionRows(
+            memoryview(self.adjacency.offsets),
+            memoryview(self.adjacency.counts),
+            memoryview(self.adjacency.next_states),
+            memoryview(self.adjacency.actions),
+            memoryview(self.keep),
+            memoryview(self.spread),
+        )
@@ -1,4 +1,5 @@
 import os
+from time import perf_counter
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 import pygame
@@ -6,8 +7,10 @@ import pygame
 from models.agent import Agent
 from models.maze import Maze
 from util.colors import DARK_GREY
+from util.export import export_animation, offscreen, save_frame
 from util.maze_generation import generate_maze
 from util.panel import PANEL_WIDTH, draw_info_panel
+from util.viewport import Viewport
 
 
 def run_pathfinding(**kwargs):
@@ -21,88 +24,162 @@ def run_pathfinding(**kwargs):
     solver = kwargs['solver']
     speed = kwargs['speed']
     cell_size = kwargs['cell_size']
-
-    pygame.init()
-    title_font = pygame.font.SysFont('arial', 18, bold=True)
-    body_font = pygame.font.SysFont('arial', 14)
-    running = True
+    export = kwargs.get('export')
 
     raw_maze, start, end = generate_maze(height, width, generator, seed)
 
     maze = Maze(raw_maze, start, end, cell_size)
-    agent = Agent(maze, solver)
+    if export:
+        export_pathfinding(
+            maze, solver, generator, export, kwargs['export_workers'], speed
+        )
+        return
+
+    pygame.init()
+    title_font, body_font = _fonts()
+    running = True
+    agent = Agent(maze, solver, background=True)
 
     rows, cols = maze.dims()
     cell_size = maze.start.size
-    maze_pixel_width = cols * cell_size
-    maze_pixel_height = rows * cell_size
+    world_size = (cols * cell_size, rows * cell_size)
+    view_width, view_height = Viewport.initial_view_size(world_size)
     screen = pygame.display.set_mode(
-        (maze_pixel_width + PANEL_WIDTH, maze_pixel_height), pygame.RESIZABLE
+        (view_width + PANEL_WIDTH, view_height), pygame.RESIZABLE
     )
+    viewport = Viewport(world_size, (view_width, view_height), cell_size)
     clock = pygame.time.Clock()
-    iterations = 0
-    finished = False
+    full_redraw = True
+    last_entries = None
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.VIDEORESIZE:
                 screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+                viewport.resize((event.w - PANEL_WIDTH, event.h))
+                full_redraw = True
+            if viewport.handle_event(event):
+                full_redraw = True
 
-        screen.fill(DARK_GREY)
-
-        maze.draw(screen)
         is_last_step = agent.step()
-        agent.draw(screen, not is_last_step)
 
-        if is_last_step:
-            agent.draw_shortest_path(screen, cell_size)
-            finished = True
+        if full_redraw:
+            screen.fill(DARK_GREY)
+            agent.draw(screen, viewport, not is_last_step)
+            dirty = [screen.get_rect()]
         else:
-            iterations += 1
-
-        entries = [
-            ('Solver', solver),
-            ('Generator', generator),
-            ('Size', f'{cols - 1}x{rows - 1}'),
-            ('---', ''),
-            ('Iteration', str(iterations)),
-        ]
-
-        if finished:
-            result = agent.pathfinding_result
-            entries.extend(
-                [
-                    ('---', ''),
-                    ('Path Length', str(len(result.shortest_path))),
-                    ('Visited', str(len(result.visited))),
-                    ('Max Fringe', str(result.max_fringe_size)),
-                    ('Runtime', f'{result.run_time:.4f}s'),
-                    ('Memory', f'{result.peak_memory_bytes} B'),
-                ]
+            dirty = agent.draw_changes(screen, viewport, not is_last_step)
+
+        entries = _entries(agent, solver, generator)
+        entries.append(('Solver Thread', agent.worker.progress()))
+        if full_redraw or entries != last_entries:
+            dirty += draw_info_panel(
+                screen,
+                viewport.view_size[0],
+                screen.get_height(),
+                'Pathfinding',
+                entries,
+                title_font,
+                body_font,
+                None if full_redraw else last_entries,
             )
+            last_entries = entries
+
+        pygame.display.update(dirty)
+        full_redraw = False
+        clock.tick(speed)
+
+    agent.worker.stop()
+    measured = agent.solver.solve(maze, maze.start, 'memory')
+    print('\n------------Evaluation-------------\n')
+
+    print(
+        f"""Shortest Path Length: {len(measured.shortest_path)}
+Cells Visited: {len(measured.visited)}
+Run Time: {agent.solve_time:.6f}s
+Peak Memory: {measured.peak_memory_bytes} bytes
+"""
+    )
+    pygame.quit()
 
+
+def export_pathfinding(
+    maze: Maze, solver: str, generator: str, path: str, workers: int, fps: int
+) -> None:
+    agent = Agent(maze, solver)
+    frames = []
+    while not agent.finished:
+        agent.step()
+        frames.append(_entries(agent, solver, generator))
+
+    export_start = perf_counter()
+    count = export_animation(
+        path,
+        _render_frames,
+        (maze, solver),
+        frames,
+        workers,
+        fps,
+        chunk_size=-(-len(frames) // max(workers, 1)),
+    )
+    print(f'Exported {count} frames to {path} in {perf_counter() - export_start:.2f}s')
+
+
+def _render_frames(scene, frames, first: int, frame_dir: str) -> None:
+    maze, solver = scene
+    pygame.font.init()
+    title_font, body_font = _fonts()
+
+    agent = Agent(maze, solver)
+    for _ in range(first):
+        agent.step()
+
+    rows, cols = maze.dims()
+    cell_size = maze.start.size
+    screen, viewport = offscreen((cols * cell_size, rows * cell_size), cell_size)
+    for i, entries in enumerate(frames):
+        is_last_step = agent.step()
+        screen.fill(DARK_GREY)
+        agent.draw(screen, viewport, not is_last_step)
         draw_info_panel(
             screen,
-            maze_pixel_width,
+            viewport.view_size[0],
             screen.get_height(),
             'Pathfinding',
             entries,
             title_font,
             body_font,
         )
+        save_frame(screen, frame_dir, first + i)
+
+
+def _entries(agent: Agent, solver: str, generator: str):
+    rows, cols = agent.maze.dims()
+    entries = [
+        ('Solver', solver),
+        ('Generator', generator),
+        ('Size', f'{cols - 1}x{rows - 1}'),
+        ('---', ''),
+        ('Iteration', str(len(agent.visited))),
+    ]
+
+    if agent.finished:
+        entries.extend(
+            [
+                ('---', ''),
+                ('Path Length', str(len(agent.shortest_path))),
+                ('Visited', str(len(agent.visited))),
+                ('Max Fringe', str(agent.max_fringe_size)),
+                ('Runtime', f'{agent.solve_time:.4f}s'),
+            ]
+        )
 
-        pygame.display.flip()
-        clock.tick(speed)
+    return entries
 
-    result = agent.pathfinding_result
-    print('\n------------Evaluation-------------\n')
 
-    print(
-        f"""Shortest Path Length: {len(result.shortest_path)}
-Cells Visited: {len(result.visited)}
-Run Time: {result.run_time:.6f}s,
-Peak Memory: {result.peak_memory_bytes} bytes
-"""
+def _fonts():
+    return (
+        pygame.font.SysFont('arial', 18, bold=True),
+        pygame.font.SysFont('arial', 14),
     )
-    pygame.quit()
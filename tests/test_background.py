@@ -0,0 +1,22 @@
+import time
+
+import numpy as np
+
+from util.background import QUEUE_BUDGET_BYTES, BackgroundIterator, queue_depth
+
+
+def test_queue_depth_fits_the_budget():
+    assert queue_depth(1024) == 64
+    assert queue_depth(QUEUE_BUDGET_BYTES // 4) == 4
+    assert queue_depth(QUEUE_BUDGET_BYTES * 2) == 1
+
+
+def test_large_frames_are_not_buffered_past_the_budget():
+    frame = np.zeros(QUEUE_BUDGET_BYTES // 3, dtype=np.uint8)
+    worker = BackgroundIterator(
+        lambda: (frame.copy() for _ in range(10)), queue_depth(frame.nbytes)
+    )
+    time.sleep(0.5)
+    assert worker.produced == 3
+
+    worker.stop()
@@ -0,0 +1,19 @@
+from algorithms.mdp_algorithms import MdpConfig
+from evaluation.evaluation import Instrumentation, _run_sweep_eval
+from util.maze_generation import generate_maze
+
+
+def test_batch_counters_are_reported_once():
+    configs = (MdpConfig(0.9, 0.0, -0.01), MdpConfig(0.9, 0.2, -0.01))
+    rows = _run_sweep_eval(
+        *generate_maze(10, 10, 'cellular', 1),
+        configs,
+        10,
+        1,
+        instrumentation=Instrumentation('timing', counters=True),
+    )
+
+    batch, *per_config = rows
+    assert batch.type == 'batch' and batch.counters['sweeps'] == batch.total_iterations
+    assert [row.counters for row in per_config] == [None, None]
+    assert max(row.total_iterations for row in per_config) == batch.total_iterations
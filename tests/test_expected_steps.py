@@ -0,0 +1,38 @@
+import pytest
+
+from evaluation.analysis.expected_steps import expected_steps
+from models.direction import ACTIONS, Action
+from models.maze import MdpMaze
+
+
+def _corridor(length: int) -> MdpMaze:
+    grid = [[1] * (length + 1), [0] * (length + 1), [1] * (length + 1)]
+    maze = MdpMaze(grid, (1, 0), (1, length), cell_size=1)
+    maze.init_states(initial_value=0, goal_reward=10)
+    maze.policy[maze.updatable] = ACTIONS.index(Action.EAST)
+    return maze
+
+
+def _corridor_steps(length: int, noise: float) -> float:
+    # e_k = (1 + p * e_{k-1}) / (1 - p) steps to advance from cell k; e_0 = 1.
+    advance = 1.0
+    total = advance
+    for _ in range(1, length):
+        advance = (1 + noise * advance) / (1 - noise)
+        total += advance
+    return total
+
+
+@pytest.mark.parametrize('noise', [0.0, 0.2, 0.4])
+def test_corridor_matches_closed_form(noise):
+    maze = _corridor(12)
+    result = expected_steps(maze, noise)
+
+    assert result.start_steps == pytest.approx(_corridor_steps(12, noise))
+    assert result.steps[maze.state_of(maze.end)] == 0
+
+
+def test_deterministic_corridor_has_no_variance():
+    result = expected_steps(_corridor(8), 0.0, variance=True)
+    assert result.start_steps == pytest.approx(8)
+    assert result.start_variance == pytest.approx(0, abs=1e-9)
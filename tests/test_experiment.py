@@ -0,0 +1,67 @@
+import json
+import sys
+
+import pytest
+
+from evaluation.evaluation import run_eval
+from evaluation.experiment import load_experiment
+from main import read_args
+
+
+def test_toml_grid_expands_to_every_combination(tmp_path):
+    path = tmp_path / 'noise.toml'
+    path.write_text(
+        'sizes = [8, 10]\n'
+        'solvers = ["mdp"]\n'
+        '[settings]\n'
+        'vi_stopping = "residual"\n'
+        '[grid]\n'
+        'gamma = [0.9, 0.99]\n'
+        'noise = 0.2\n'
+    )
+
+    experiment = load_experiment(str(path))
+    assert experiment.name == 'noise'
+    assert (experiment.sizes, experiment.solvers, experiment.seeds) == (
+        [8, 10],
+        ['mdp'],
+        None,
+    )
+    assert experiment.settings == {'vi_stopping': 'residual'}
+    assert experiment.grid == [
+        {'gamma': 0.9, 'noise': 0.2},
+        {'gamma': 0.99, 'noise': 0.2},
+    ]
+
+
+def test_json_without_grid_has_one_point(tmp_path):
+    path = tmp_path / 'plain.json'
+    path.write_text(json.dumps({'generators': ['prims']}))
+
+    experiment = load_experiment(str(path))
+    assert experiment.generators == ['prims']
+    assert experiment.grid == [{}]
+
+
+@pytest.mark.parametrize(
+    'spec, message',
+    [
+        ({'size': [8]}, 'Unknown experiment keys'),
+        ({'solvers': ['mdp', 'astar']}, 'Unknown solver sets'),
+    ],
+)
+def test_invalid_specs_are_rejected(tmp_path, spec, message):
+    path = tmp_path / 'bad.json'
+    path.write_text(json.dumps(spec))
+
+    with pytest.raises(ValueError, match=message):
+        load_experiment(str(path))
+
+
+def test_unknown_settings_are_rejected_before_running(tmp_path, monkeypatch):
+    path = tmp_path / 'typo.json'
+    path.write_text(json.dumps({'grid': {'gama': [0.9]}}))
+    monkeypatch.setattr(sys, 'argv', ['main.py', 'eval', '--config', str(path)])
+
+    with pytest.raises(ValueError, match=r"Unknown eval settings \['gama'\]"):
+        run_eval(**vars(read_args()))
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from algorithms.mdp_algorithms import LRTDP, ValueIteration
+from models.maze import MdpMaze
+from util.maze_generation import generate_maze
+
+
+def _maze() -> MdpMaze:
+    random.seed(0)
+    maze = MdpMaze(*generate_maze(12, 12, 'prims', 1), cell_size=1)
+    maze.init_states(initial_value=0, goal_reward=10)
+    return maze
+
+
+@pytest.mark.parametrize('heuristic', ['bfs', 'manhattan'])
+def test_lrtdp_start_value_matches_vi(heuristic):
+    exact = _maze()
+    ValueIteration(0.9, -0.01, theta=1e-9).solve(
+        exact, take_snapshots=False, instrumentation='timing'
+    )
+    maze = _maze()
+    result = LRTDP(0.9, -0.01, theta=1e-4, heuristic=heuristic, seed=1).solve(
+        maze, take_snapshots=False, instrumentation='timing'
+    )
+
+    start = maze.state_of(maze.start)
+    assert maze.values[start] == pytest.approx(exact.values[start], abs=1e-2)
+    assert result.shortest_path == exact.shortest_path(exact.start, exact.end)
+    assert result.touched_states + result.untouched_states == (~maze.terminals).sum()
@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+import pytest
+
+from algorithms.mdp_algorithms import ValueIteration
+from algorithms.parallel_mdp import ParallelValueIteration
+from models.maze import MdpMaze
+from util.maze_generation import generate_maze
+
+
+def _maze() -> MdpMaze:
+    random.seed(0)
+    maze = MdpMaze(*generate_maze(20, 20, 'prims', 1), cell_size=1)
+    maze.init_states(initial_value=0, goal_reward=10)
+    return maze
+
+
+@pytest.mark.parametrize('mode', ['jacobi', 'async'])
+def test_parallel_vi_matches_serial_vi(mode):
+    serial = _maze()
+    ValueIteration(0.9, -0.01, theta=1e-9).solve(
+        serial, take_snapshots=False, instrumentation='timing'
+    )
+    parallel = _maze()
+    result = ParallelValueIteration(0.9, -0.01, theta=1e-9, workers=2, mode=mode).solve(
+        parallel, instrumentation='timing'
+    )
+
+    assert np.allclose(parallel.values, serial.values, atol=1e-6)
+    assert np.array_equal(
+        parallel.policy[parallel.updatable], serial.policy[serial.updatable]
+    )
+    assert result.shortest_path == serial.shortest_path(serial.start, serial.end)
@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+import pytest
+
+from algorithms.mdp_algorithms import (
+    BatchValueIteration,
+    MdpConfig,
+    PolicyIteration,
+    ValueIteration,
+)
+from models.maze import MdpMaze
+from util.maze_generation import generate_maze
+
+SOLVERS = {
+    'vi': lambda maze: ValueIteration(0.9, -0.01).solve(
+        maze, take_snapshots=False, instrumentation='timing'
+    ),
+    'pi': lambda maze: PolicyIteration(0.9, -0.01, theta=1e-7).solve(
+        maze, take_snapshots=False, instrumentation='timing'
+    ),
+    'batch': lambda maze: BatchValueIteration([MdpConfig(0.9, 0.2, -0.01)]).solve(
+        maze, instrumentation='timing'
+    ),
+}
+
+
+def _solved_maze(solve, dtype: str) -> MdpMaze:
+    random.seed(0)
+    maze = MdpMaze(*generate_maze(40, 40, 'prims', 1), cell_size=1, dtype=dtype)
+    maze.init_states(initial_value=0, goal_reward=10)
+    solve(maze)
+    return maze
+
+
+@pytest.mark.parametrize('name', SOLVERS)
+def test_float32_matches_float64_policy(name):
+    compact = _solved_maze(SOLVERS[name], 'float32')
+    exact = _solved_maze(SOLVERS[name], 'float64')
+
+    assert np.array_equal(
+        compact.policy[compact.updatable], exact.policy[exact.updatable]
+    )
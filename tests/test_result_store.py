@@ -0,0 +1,41 @@
+import sys
+
+import pytest
+
+from evaluation.evaluation import run_eval
+from evaluation.result_store import ResultStore, content_key
+from main import read_args
+
+
+def _eval(monkeypatch, *args: str) -> None:
+    monkeypatch.setattr(sys, 'argv', ['main.py', 'eval', *args])
+    run_eval(**vars(read_args()))
+
+
+def test_rows_round_trip(tmp_path):
+    path = str(tmp_path / 'results.db')
+    key = content_key({'size': 5})
+    rows = [{'algorithm': 'BFS', 'path_length': 9, 'runtime_s': 0.5}]
+
+    store = ResultStore(path)
+    store.add(key, {'size': 5}, rows)
+    store.close()
+
+    store = ResultStore(path)
+    assert store.completed([key, content_key({'size': 6})]) == {key: rows}
+    store.close()
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_eval_resumes_from_store(tmp_path, monkeypatch, capsys, workers):
+    args = ['--size', '8,10', '--seed', '1', '--pathfinding', '--mdp']
+    store = ['--store', str(tmp_path / 'results.db'), '--workers', workers]
+
+    _eval(monkeypatch, *args, *store)
+    first = capsys.readouterr().out
+    _eval(monkeypatch, *args, *store)
+    second = capsys.readouterr().out
+
+    assert 'Reusing' not in first
+    assert 'Reusing 4 of 4 jobs' in second
+    assert first.count('BFS') == second.count('BFS') == 2
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from algorithms.rl_algorithms import VectorizedMazeEnv
+from models.maze import MdpMaze
+from util.maze_generation import generate_maze
+
+
+@pytest.fixture
+def maze() -> MdpMaze:
+    return MdpMaze(*generate_maze(10, 10, 'cellular', 1), cell_size=1)
+
+
+def _taken(env: VectorizedMazeEnv, state: int, action: int) -> np.ndarray:
+    env.reset()
+    env.states[:] = state
+    next_states, *_ = env.step(np.full(env.n_envs, action))
+    successors = list(env.model.successors[state])
+    return np.array([successors.index(s) for s in next_states])
+
+
+def test_slips_spread_evenly_over_the_other_open_actions(maze):
+    env = VectorizedMazeEnv(maze, noise=0.2, living_reward=-0.01, n_envs=40_000, seed=0)
+    counts = (maze.successors >= 0).sum(axis=1)
+    state = int(np.flatnonzero(maze.updatable & (counts == counts.max()))[0])
+    actions = np.flatnonzero(maze.successors[state] >= 0)
+
+    taken = _taken(env, state, actions[0])
+    shares = np.bincount(taken, minlength=4) / env.n_envs
+
+    assert shares[actions[0]] == pytest.approx(0.8, abs=0.01)
+    for other in actions[1:]:
+        assert shares[other] == pytest.approx(0.2 / (len(actions) - 1), abs=0.01)
+    assert shares[maze.successors[state] < 0].sum() == 0
+
+
+def test_dead_ends_never_slip(maze):
+    env = VectorizedMazeEnv(maze, noise=0.2, living_reward=-0.01, n_envs=1000, seed=0)
+    counts = (maze.successors >= 0).sum(axis=1)
+    state = int(np.flatnonzero(maze.updatable & (counts == 1))[0])
+    action = int(np.flatnonzero(maze.successors[state] >= 0)[0])
+
+    assert (_taken(env, state, action) == action).all()
+
+
+def test_rewards_and_episode_ends(maze):
+    env = VectorizedMazeEnv(maze, noise=0.0, living_reward=-0.5, n_envs=4, seed=0)
+    goal = maze.state_of(maze.end)
+    state, action = next(zip(*np.nonzero(maze.successors == goal)))
+
+    env.reset()
+    env.states[:] = state
+    next_states, rewards, dones, truncated = env.step(np.full(4, action))
+
+    assert (next_states == goal).all() and dones.all() and not truncated.any()
+    assert rewards == pytest.approx(-0.5)
+    assert (env.states == env.start).all()
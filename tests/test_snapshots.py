@@ -0,0 +1,35 @@
+import random
+
+import numpy as np
+
+from algorithms.mdp_algorithms import PolicyIteration, ValueIteration
+from models.maze import MdpMaze
+from util.maze_generation import generate_maze
+
+
+def _maze(size: int) -> MdpMaze:
+    random.seed(0)
+    maze = MdpMaze(*generate_maze(size, size, 'prims', 1), cell_size=1)
+    maze.init_states(initial_value=0, goal_reward=10)
+    return maze
+
+
+def test_snapshots_copy_values_and_policy():
+    maze = _maze(20)
+    result = ValueIteration(0.9, -0.01).solve(maze, instrumentation='timing')
+
+    first, last = result.snapshots[0], result.snapshots[-1]
+    assert len(result.snapshots) == result.iterations + 1
+    assert first.values is not maze.values and first.policy is not maze.policy
+    assert not np.array_equal(first.values, last.values)
+    assert np.array_equal(last.values, maze.values)
+    assert np.array_equal(last.policy, maze.policy)
+
+
+def test_solve_peak_memory_does_not_grow_with_the_maze():
+    for solver in (ValueIteration(0.9, -0.01), PolicyIteration(0.9, -0.01)):
+        small, large = _maze(30), _maze(60)
+        small_peak = solver.solve(small, take_snapshots=False).peak_memory
+        large_peak = solver.solve(large, take_snapshots=False).peak_memory
+
+        assert large_peak - small_peak < large.values.nbytes
@@ -0,0 +1,66 @@
+import time
+from dataclasses import dataclass
+
+from evaluation.evaluation import EvalRow, Instrumentation, _measure, _solver_rows
+from evaluation.supervisor import JobLimits, enter_phase, run_supervised
+
+
+@dataclass(frozen=True)
+class _Slept:
+    run_time: float
+    peak_memory: int = 0
+
+
+def _sleep_phases(*seconds: float) -> str:
+    for i, s in enumerate(seconds):
+        enter_phase(f'phase {i}')
+        time.sleep(s)
+    return 'done'
+
+
+def _allocate(megabytes: int) -> int:
+    block = b'x' * (megabytes << 20)
+    time.sleep(2)
+    return len(block)
+
+
+def test_ok_outcome_carries_the_value():
+    outcome = run_supervised(_sleep_phases, (0.0,), JobLimits(timeout_s=5))
+    assert (outcome.status, outcome.value) == ('ok', 'done')
+
+
+def test_timeout_applies_per_phase_and_names_it():
+    ok = run_supervised(_sleep_phases, (0.3, 0.3, 0.3), JobLimits(timeout_s=0.6))
+    assert ok.status == 'ok'
+
+    cut = run_supervised(_sleep_phases, (0.1, 5.0), JobLimits(timeout_s=0.6))
+    assert (cut.status, cut.phase, cut.value) == ('timeout', 'phase 1', None)
+    assert cut.run_time < 2
+
+
+def test_memory_limit_records_oom():
+    outcome = run_supervised(_allocate, (256,), JobLimits(memory_bytes=64 << 20))
+    assert outcome.status == 'oom'
+    assert outcome.peak_rss_bytes > 64 << 20
+
+
+def test_solver_rows_report_the_cut_off_run():
+    limits = JobLimits(timeout_s=0.6)
+    instrumentation = Instrumentation('both', repeats=3, limits=limits)
+
+    def solve_rows(memory_sleep: float):
+        def solve(mode: str) -> _Slept:
+            seconds = memory_sleep if mode == 'memory' else 0.3
+            time.sleep(seconds)
+            return _Slept(seconds)
+
+        _measure(instrumentation, solve, 'sleep')
+        return [EvalRow(10, 1, 'mdp', 'sleep', *[None] * 6, 0.0, None)]
+
+    ok = _solver_rows(instrumentation, 10, 1, 'mdp', 'sleep', lambda: solve_rows(0.3))
+    assert [row.status for row in ok] == ['ok']
+
+    [failed] = _solver_rows(
+        instrumentation, 10, 1, 'mdp', 'sleep', lambda: solve_rows(5.0)
+    )
+    assert (failed.status, failed.phase) == ('timeout', 'memory')
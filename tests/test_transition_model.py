@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from models.maze import MdpMaze
+from util.maze_generation import generate_maze
+
+
+@pytest.fixture
+def maze() -> MdpMaze:
+    return MdpMaze(*generate_maze(10, 10, 'prims', 1), cell_size=1)
+
+
+def test_model_is_cached_per_noise(maze):
+    model = maze.compile_transitions(0.2)
+    assert maze.compile_transitions(0.2) is model
+    assert maze.compile_transitions(0.1) is not model
+
+
+def test_transition_rows_follow_the_noise_model(maze):
+    rows = maze.compile_transitions(0.2).rows()
+    for s in range(len(maze.values)):
+        actions = [a for a in range(4) if maze.successors[s, a] >= 0]
+        for action in actions:
+            next_states, probabilities = rows.transitions(s, action)
+            assert next_states == [maze.successors[s, a] for a in actions]
+            assert sum(probabilities) == pytest.approx(1.0)
+            if len(actions) > 1:
+                intended = probabilities[actions.index(action)]
+                assert intended == pytest.approx(0.8)
+                assert np.allclose(
+                    np.delete(probabilities, actions.index(action)),
+                    0.2 / (len(actions) - 1),
+                )
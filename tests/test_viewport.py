@@ -0,0 +1,77 @@
+import gc
+
+from pygame import Surface
+
+from util.viewport import Layer, Viewport
+
+
+def _zoomed_out(world: int) -> Viewport:
+    viewport = Viewport((world, world), (world // 8, world // 8), cell_size=1)
+    assert viewport.zoom == 1 / 8
+    return viewport
+
+
+def test_lod_is_cached_per_layer_and_version():
+    viewport = _zoomed_out(256)
+    layer = Layer(Surface((256, 256)))
+
+    lod, scale = viewport._level(layer)
+    assert (lod.get_size(), scale) == ((32, 32), 8)
+    assert viewport._level(layer)[0] is lod
+
+    layer.version += 1
+    assert viewport._level(layer)[0] is not lod
+
+
+def test_lod_is_dropped_with_its_layer():
+    viewport = _zoomed_out(256)
+    layer = Layer(Surface((256, 256)))
+    viewport._level(layer)
+    assert len(viewport._lods) == 1
+
+    del layer
+    gc.collect()
+    assert len(viewport._lods) == 0
+
+
+def test_zoom_keeps_the_point_under_the_cursor():
+    viewport = Viewport((1000, 800), (200, 100), cell_size=10)
+    viewport.zoom_at((0, 0), 8)
+    assert viewport.zoom == 1.0
+
+    anchor = viewport.to_world((50, 40))
+    assert viewport.zoom_at((50, 40), 1.25)
+    assert viewport.to_world((50, 40)) == anchor
+
+
+def test_zoom_is_bounded():
+    viewport = Viewport((1000, 800), (200, 100), cell_size=10)
+    for _ in range(50):
+        viewport.zoom_at((0, 0), 1.25)
+    assert viewport.zoom == 6.4
+    assert not viewport.zoom_at((0, 0), 1.25)
+
+    for _ in range(50):
+        viewport.zoom_at((0, 0), 0.8)
+    assert viewport.zoom == 1 / 1000
+
+
+def test_pan_is_clamped_to_the_world():
+    viewport = Viewport((1000, 800), (200, 100), cell_size=10)
+    viewport.zoom_at((0, 0), 8)
+
+    assert viewport.pan(5000, 5000)
+    assert viewport.offset == [800.0, 700.0]
+    assert not viewport.pan(10, 10)
+    assert viewport.pan(-5000, -5000)
+    assert viewport.offset == [0.0, 0.0]
+
+
+def test_visible_cells_cover_the_view():
+    viewport = Viewport((1000, 800), (200, 100), cell_size=10)
+    viewport.zoom_at((0, 0), 8)
+    viewport.pan(105, 42)
+
+    rows, cols = viewport.visible_cells()
+    assert (rows.start, rows.stop) == (4, 15)
+    assert (cols.start, cols.stop) == (10, 31)
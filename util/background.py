@@ -0,0 +1,70 @@
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from time import perf_counter
+from typing import Generic, TypeVar
+
+T = TypeVar('T')
+
+QUEUE_BUDGET_BYTES = 64 << 20
+
+
+def queue_depth(item_bytes: int, maxsize=64, budget=QUEUE_BUDGET_BYTES) -> int:
+    return max(1, min(maxsize, budget // max(item_bytes, 1)))
+
+
+class BackgroundIterator(Generic[T]):
+    def __init__(self, items: Callable[[], Iterator[T]], maxsize=64) -> None:
+        self.produced = 0
+        self.busy_time = 0.0
+        self._queue: queue.Queue[T] = queue.Queue(maxsize)
+        self._done = threading.Event()
+        self._stopped = threading.Event()
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, args=(items,), daemon=True)
+        self._thread.start()
+
+    @property
+    def exhausted(self) -> bool:
+        return self._done.is_set() and self._queue.empty()
+
+    def progress(self) -> str:
+        state = 'done' if self._done.is_set() else 'running'
+        return f'{state} ({self.produced} steps)'
+
+    def poll(self) -> T | None:
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            if self.exhausted and self._error is not None:
+                raise self._error
+            return None
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self, items: Callable[[], Iterator[T]]) -> None:
+        try:
+            step_start = perf_counter()
+            iterator = items()
+            for item in iterator:
+                self.busy_time += perf_counter() - step_start
+                if not self._put(item):
+                    return
+                self.produced += 1
+                step_start = perf_counter()
+            self.busy_time += perf_counter() - step_start
+        except Exception as e:  # noqa: BLE001 - re-raised by the consumer
+            self._error = e
+        finally:
+            self._done.set()
+
+    def _put(self, item: T) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
@@ -0,0 +1,130 @@
+import itertools
+import multiprocessing as mp
+import os
+import tempfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from pathlib import Path
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+import pygame
+
+from util.panel import PANEL_WIDTH
+from util.viewport import Viewport
+
+FRAME_NAME = 'frame_{:06d}.png'
+CHUNK_FRAMES = 32
+
+RenderRange = Callable[[object, Sequence, int, str], None]
+
+_worker_scene: tuple[RenderRange, object] | None = None
+
+
+def headless() -> None:
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+
+def export_animation(
+    path: str,
+    render_range: RenderRange,
+    scene,
+    frames: Iterable,
+    workers=1,
+    fps=40,
+    chunk_size=CHUNK_FRAMES,
+) -> int:
+    headless()
+    chunks = _chunks(frames, max(chunk_size, 1))
+    if path.lower().endswith('.gif'):
+        with tempfile.TemporaryDirectory() as frame_dir:
+            count = _render(render_range, scene, chunks, workers, frame_dir)
+            _write_gif(path, frame_dir, count, fps)
+    else:
+        os.makedirs(path, exist_ok=True)
+        count = _render(render_range, scene, chunks, workers, path)
+
+    return count
+
+
+def offscreen(world_size: tuple[int, int], cell_size: int):
+    view_size = Viewport.initial_view_size(world_size)
+    screen = pygame.Surface((view_size[0] + PANEL_WIDTH, view_size[1]), 0, 32)
+    return screen, Viewport(world_size, view_size, cell_size)
+
+
+def save_frame(screen: pygame.Surface, frame_dir: str, index: int) -> None:
+    pygame.image.save(screen, os.path.join(frame_dir, FRAME_NAME.format(index)))
+
+
+def _render(
+    render_range: RenderRange,
+    scene,
+    chunks: Iterator[list],
+    workers: int,
+    frame_dir: str,
+) -> int:
+    count = 0
+    if workers <= 1:
+        for chunk in chunks:
+            render_range(scene, chunk, count, frame_dir)
+            count += len(chunk)
+        return count
+
+    pending = deque()
+    with mp.get_context().Pool(
+        workers, initializer=_init_worker, initargs=(render_range, scene)
+    ) as pool:
+        for chunk in chunks:
+            if len(pending) >= 2 * workers:
+                pending.popleft().get()
+            pending.append(pool.apply_async(_render_chunk, (chunk, count, frame_dir)))
+            count += len(chunk)
+
+        for result in pending:
+            result.get()
+
+    return count
+
+
+def _init_worker(render_range: RenderRange, scene) -> None:
+    global _worker_scene
+    headless()
+    _worker_scene = (render_range, scene)
+
+
+def _render_chunk(frames: list, first: int, frame_dir: str) -> None:
+    render_range, scene = _worker_scene
+    render_range(scene, frames, first, frame_dir)
+
+
+def _chunks(frames: Iterable, size: int) -> Iterator[list]:
+    frames = iter(frames)
+    while chunk := list(itertools.islice(frames, size)):
+        yield chunk
+
+
+def _write_gif(path: str, frame_dir: str, count: int, fps: int) -> None:
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError('GIF export requires Pillow: pip install pillow') from e
+
+    if count == 0:
+        return
+
+    def frames():
+        for i in range(count):
+            with Image.open(Path(frame_dir) / FRAME_NAME.format(i)) as image:
+                yield image.convert('P', palette=Image.Palette.ADAPTIVE)
+
+    images = frames()
+    first = next(images)
+    first.save(
+        path,
+        save_all=True,
+        append_images=images,
+        duration=max(1000 // max(fps, 1), 20),
+        loop=0,
+        optimize=False,
+    )
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import pygame
 from pygame import Surface
 
@@ -7,6 +9,9 @@ PANEL_WIDTH = 220
 PANEL_BG = (30, 30, 30)
 SEPARATOR_COLOR = (60, 60, 60)
 LABEL_COLOR = (180, 180, 180)
+HEADER_HEIGHT = 60
+ROW_HEIGHT = 22
+TEXT_CACHE_SIZE = 1024
 
 
 def draw_info_panel(
@@ -17,37 +22,82 @@ def draw_info_panel(
     entries: list[tuple[str, str] | None],
     title_font: pygame.font.Font,
     body_font: pygame.font.Font,
+    previous: list[tuple[str, str] | None] | None = None,
+) -> list[pygame.Rect]:
+    rows = _row_positions(entries)
+    if previous is None or _labels(previous) != _labels(entries):
+        panel_rect = pygame.Rect(x, 0, PANEL_WIDTH, height)
+        screen.fill(PANEL_BG, panel_rect)
+        screen.blit(_panel_header(title, title_font), (x, 0))
+        for entry, y in zip(entries, rows):
+            _draw_entry(screen, x, y, entry, body_font)
+        return [panel_rect]
+
+    dirty = []
+    for entry, old, y in zip(entries, previous, rows):
+        if entry != old:
+            row_rect = pygame.Rect(x, y, PANEL_WIDTH, ROW_HEIGHT)
+            screen.fill(PANEL_BG, row_rect)
+            _draw_entry(screen, x, y, entry, body_font)
+            dirty.append(row_rect)
+
+    return dirty
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font: pygame.font.Font, text: str, color) -> Surface:
+    return font.render(text, True, color)
+
+
+@lru_cache(maxsize=8)
+def _panel_header(title: str, title_font: pygame.font.Font) -> Surface:
+    header = Surface((PANEL_WIDTH, HEADER_HEIGHT))
+    header.fill(PANEL_BG)
+    header.blit(render_text(title_font, title, WHITE), (15, 15))
+    pygame.draw.line(header, SEPARATOR_COLOR, (10, 45), (PANEL_WIDTH - 10, 45))
+    return header
+
+
+def _draw_entry(
+    screen: Surface,
+    x: int,
+    y: int,
+    entry: tuple[str, str] | None,
+    body_font: pygame.font.Font,
 ) -> None:
-    panel_rect = pygame.Rect(x, 0, PANEL_WIDTH, height)
-    pygame.draw.rect(screen, PANEL_BG, panel_rect)
+    if entry is None:
+        return
 
-    y = 15
+    label, value = entry
+    if label == '---':
+        pygame.draw.line(
+            screen,
+            SEPARATOR_COLOR,
+            (x + 10, y),
+            (x + PANEL_WIDTH - 10, y),
+        )
+        return
 
-    title_surface = title_font.render(title, True, WHITE)
-    screen.blit(title_surface, (x + 15, y))
-    y += 30
+    label_surface = render_text(body_font, f'{label}: ', LABEL_COLOR)
+    value_surface = render_text(body_font, str(value), WHITE)
+    screen.blit(label_surface, (x + 15, y))
+    screen.blit(value_surface, (x + 15 + label_surface.get_width(), y))
 
-    pygame.draw.line(screen, SEPARATOR_COLOR, (x + 10, y), (x + PANEL_WIDTH - 10, y))
-    y += 15
 
+def _row_positions(entries: list[tuple[str, str] | None]) -> list[int]:
+    rows = []
+    y = HEADER_HEIGHT
     for entry in entries:
+        rows.append(y)
         if entry is None:
             y += 10
-            continue
-
-        label, value = entry
-        if label == '---':
-            pygame.draw.line(
-                screen,
-                SEPARATOR_COLOR,
-                (x + 10, y),
-                (x + PANEL_WIDTH - 10, y),
-            )
+        elif entry[0] == '---':
             y += 15
-            continue
+        else:
+            y += ROW_HEIGHT
+
+    return rows
+
 
-        label_surface = body_font.render(f'{label}: ', True, LABEL_COLOR)
-        value_surface = body_font.render(str(value), True, WHITE)
-        screen.blit(label_surface, (x + 15, y))
-        screen.blit(value_surface, (x + 15 + label_surface.get_width(), y))
-        y += 22
+def _labels(entries: list[tuple[str, str] | None]) -> list[str | None]:
+    return [entry and entry[0] for entry in entries]
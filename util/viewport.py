@@ -0,0 +1,219 @@
+import math
+from dataclasses import dataclass
+from weakref import WeakKeyDictionary
+
+import pygame
+from pygame import Rect, Surface
+
+ZOOM_STEP = 1.25
+PAN_STEP = 40
+MIN_DETAIL_PX = 6
+MAX_VIEW_SIZE = (1280, 900)
+
+
+@dataclass(eq=False)
+class Layer:
+    surface: Surface
+    scale: int = 1
+    version: int = 0
+
+
+class Viewport:
+    def __init__(
+        self, world_size: tuple[int, int], view_size: tuple[int, int], cell_size: int
+    ) -> None:
+        self.world_size = world_size
+        self.view_size = view_size
+        self.cell_size = cell_size
+        self.zoom = 1.0
+        self.offset = [0.0, 0.0]
+        self._dragging = False
+        self._lods: WeakKeyDictionary[Layer, tuple[int, int, Surface]] = (
+            WeakKeyDictionary()
+        )
+        self.fit()
+
+    @staticmethod
+    def initial_view_size(world_size: tuple[int, int]) -> tuple[int, int]:
+        max_w, max_h = MAX_VIEW_SIZE
+        if pygame.display.get_init():
+            desktops = pygame.display.get_desktop_sizes()
+            if desktops:
+                max_w, max_h = desktops[0][0] - 320, desktops[0][1] - 120
+
+        return (
+            max(min(world_size[0], max_w), 1),
+            max(min(world_size[1], max_h), 1),
+        )
+
+    def fit(self) -> None:
+        world_w, world_h = self.world_size
+        view_w, view_h = self.view_size
+        self.zoom = min(1.0, view_w / world_w, view_h / world_h)
+        self.offset = [0.0, 0.0]
+        self._clamp()
+
+    def resize(self, view_size: tuple[int, int]) -> None:
+        self.view_size = (max(view_size[0], 1), max(view_size[1], 1))
+        self._clamp()
+
+    def view_rect(self) -> Rect:
+        return Rect(0, 0, *self.view_size)
+
+    def cell_px(self) -> float:
+        return self.zoom * self.cell_size
+
+    def shows_detail(self) -> bool:
+        return self.cell_px() >= MIN_DETAIL_PX
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        if event.type == pygame.MOUSEWHEEL:
+            factor = ZOOM_STEP if event.y > 0 else 1 / ZOOM_STEP
+            return self.zoom_at(pygame.mouse.get_pos(), factor)
+
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):
+            self._dragging = self.view_rect().collidepoint(event.pos)
+        elif event.type == pygame.MOUSEBUTTONUP and event.button in (1, 2, 3):
+            self._dragging = False
+        elif event.type == pygame.MOUSEMOTION and self._dragging:
+            return self.pan(-event.rel[0] / self.zoom, -event.rel[1] / self.zoom)
+        elif event.type == pygame.KEYDOWN:
+            return self._handle_key(event.key)
+
+        return False
+
+    def zoom_at(self, pos: tuple[int, int], factor: float) -> bool:
+        world_x, world_y = self.to_world(pos)
+        old_zoom = self.zoom
+        min_zoom = min(1.0, 1 / max(self.world_size))
+        self.zoom = min(max(self.zoom * factor, min_zoom), 64.0 / self.cell_size)
+        self.offset = [
+            world_x - pos[0] / self.zoom,
+            world_y - pos[1] / self.zoom,
+        ]
+        self._clamp()
+        return self.zoom != old_zoom
+
+    def pan(self, dx: float, dy: float) -> bool:
+        old = list(self.offset)
+        self.offset[0] += dx
+        self.offset[1] += dy
+        self._clamp()
+        return self.offset != old
+
+    def to_world(self, pos: tuple[float, float]) -> tuple[float, float]:
+        return (
+            self.offset[0] + pos[0] / self.zoom,
+            self.offset[1] + pos[1] / self.zoom,
+        )
+
+    def to_screen(self, pos: tuple[float, float]) -> tuple[float, float]:
+        return (
+            (pos[0] - self.offset[0]) * self.zoom,
+            (pos[1] - self.offset[1]) * self.zoom,
+        )
+
+    def screen_rect(self, world_rect: Rect) -> Rect:
+        x0, y0 = self.to_screen(world_rect.topleft)
+        x1, y1 = self.to_screen(world_rect.bottomright)
+        left, top = math.floor(x0), math.floor(y0)
+        return Rect(left, top, math.floor(x1) - left, math.floor(y1) - top)
+
+    def visible_world_rect(self) -> Rect:
+        x0, y0 = self.to_world((0, 0))
+        x1, y1 = self.to_world(self.view_size)
+        left, top = max(math.floor(x0), 0), max(math.floor(y0), 0)
+        right = min(math.ceil(x1), self.world_size[0])
+        bottom = min(math.ceil(y1), self.world_size[1])
+        return Rect(left, top, max(right - left, 0), max(bottom - top, 0))
+
+    def visible_cells(self) -> tuple[range, range]:
+        visible = self.visible_world_rect()
+        size = self.cell_size
+        rows = range(visible.top // size, -(-visible.bottom // size))
+        cols = range(visible.left // size, -(-visible.right // size))
+        return rows, cols
+
+    def is_visible(self, world_rect: Rect) -> bool:
+        return self.visible_world_rect().colliderect(world_rect)
+
+    def render(
+        self, screen: Surface, layers: list[Layer], world_rect: Rect | None = None
+    ) -> Rect | None:
+        area = self.visible_world_rect()
+        if world_rect is not None:
+            area = area.clip(world_rect)
+        if area.width == 0 or area.height == 0:
+            return None
+
+        levels = [self._level(layer) for layer in layers]
+        grid = max(scale for _, scale in levels)
+        left, top = (area.left // grid) * grid, (area.top // grid) * grid
+        right = min(-(-area.right // grid) * grid, self.world_size[0])
+        bottom = min(-(-area.bottom // grid) * grid, self.world_size[1])
+        area = Rect(left, top, right - left, bottom - top)
+        dest = self.screen_rect(area)
+        if dest.width <= 0 or dest.height <= 0:
+            return None
+
+        clip = screen.get_clip()
+        screen.set_clip(self.view_rect().clip(clip))
+        for surface, scale in levels:
+            src = Rect(
+                area.left // scale,
+                area.top // scale,
+                -(-area.right // scale) - area.left // scale,
+                -(-area.bottom // scale) - area.top // scale,
+            ).clip(surface.get_rect())
+            if src.size == dest.size:
+                screen.blit(surface, dest, src)
+            else:
+                piece = pygame.transform.scale(surface.subsurface(src), dest.size)
+                screen.blit(piece, dest)
+        screen.set_clip(clip)
+
+        return dest.clip(self.view_rect())
+
+    def _level(self, layer: Layer) -> tuple[Surface, int]:
+        px_per_texel = self.zoom * layer.scale
+        if px_per_texel >= 1:
+            self._lods.pop(layer, None)
+            return layer.surface, layer.scale
+
+        factor = 2 ** math.ceil(math.log2(1 / px_per_texel))
+        cached = self._lods.get(layer)
+        if cached is None or cached[0] != factor or cached[1] != layer.version:
+            width, height = layer.surface.get_size()
+            size = (max(-(-width // factor), 1), max(-(-height // factor), 1))
+            lod = pygame.transform.smoothscale(layer.surface, size)
+            cached = (factor, layer.version, lod)
+            self._lods[layer] = cached
+
+        return cached[2], layer.scale * factor
+
+    def _handle_key(self, key: int) -> bool:
+        if key in (pygame.K_LEFT, pygame.K_a):
+            return self.pan(-PAN_STEP / self.zoom, 0)
+        if key in (pygame.K_RIGHT, pygame.K_d):
+            return self.pan(PAN_STEP / self.zoom, 0)
+        if key in (pygame.K_UP, pygame.K_w):
+            return self.pan(0, -PAN_STEP / self.zoom)
+        if key in (pygame.K_DOWN, pygame.K_s):
+            return self.pan(0, PAN_STEP / self.zoom)
+
+        center = (self.view_size[0] // 2, self.view_size[1] // 2)
+        if key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            return self.zoom_at(center, ZOOM_STEP)
+        if key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            return self.zoom_at(center, 1 / ZOOM_STEP)
+        if key in (pygame.K_0, pygame.K_HOME):
+            self.fit()
+            return True
+
+        return False
+
+    def _clamp(self) -> None:
+        world_w, world_h = self.world_size
+        view_w, view_h = self.view_size[0] / self.zoom, self.view_size[1] / self.zoom
+        self.offset[0] = min(max(self.offset[0], 0.0), max(world_w - view_w, 0.0))
+        self.offset[1] = min(max(self.offset[1], 0.0), max(world_h - view_h, 0.0))